@@ -79,8 +79,10 @@ class BaseIconMap:
 
     async def test_icon_map_delete(self):
         # Delete a template
-        icon_map_id = self.zci._zabbix.get_icon_maps(["Cloud_Naming"])[0]["iconmapid"]
-        self.zci._zabbix.delete_icon_maps([icon_map_id])
+        icon_map_id = (await self.zci._zabbix.get_icon_maps(["Cloud_Naming"]))[0][
+            "iconmapid"
+        ]
+        await self.zci._zabbix.delete_icon_maps([icon_map_id])
 
         # Push changes to git
         changed = await self.zci.push()
@@ -97,8 +99,8 @@ class BaseIconMap:
 
     async def test_icon_map_change(self):
         # Rename a template
-        image = self.zci._zabbix.get_icon_maps(["Cloud_Naming"])[0]
-        self.zci._zabbix.update_icon_map(
+        image = (await self.zci._zabbix.get_icon_maps(["Cloud_Naming"]))[0]
+        await self.zci._zabbix.update_icon_map(
             {"name": "Cloud_Naming_(renamed)", "iconmapid": image["iconmapid"]}
         )
 
@@ -107,7 +109,7 @@ class BaseIconMap:
         self.assertTrue(changed, "Icon map change not detected")
 
         # Revert changes in Zabbix
-        self.zci._zabbix.update_icon_map(
+        await self.zci._zabbix.update_icon_map(
             {"name": "Cloud_Naming", "iconmapid": image["iconmapid"]}
         )
 
@@ -116,7 +118,7 @@ class BaseIconMap:
         self.assertTrue(changed, "Icon map was not restored")
 
         # Assert Git version is imported back into Zabbix
-        matches = self.zci._zabbix.get_icon_maps(["Cloud_Naming_(renamed)"])
+        matches = await self.zci._zabbix.get_icon_maps(["Cloud_Naming_(renamed)"])
         self.assertEqual(len(matches), 1, "Icon map not found")
 
     async def asyncTearDown(self):
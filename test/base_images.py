@@ -79,8 +79,8 @@ class BaseImages:
 
     async def test_image_delete(self):
         # Delete a template
-        image_id = self.zci._zabbix.get_images(["Cloud_(128)"])[0]["imageid"]
-        self.zci._zabbix.delete_images([image_id])
+        image_id = (await self.zci._zabbix.get_images(["Cloud_(128)"]))[0]["imageid"]
+        await self.zci._zabbix.delete_images([image_id])
 
         # Push changes to git
         changed = await self.zci.push()
@@ -97,8 +97,8 @@ class BaseImages:
 
     async def test_image_change(self):
         # Rename a template
-        image = self.zci._zabbix.get_images(["Cloud_(128)"])[0]
-        self.zci._zabbix.update_image(
+        image = (await self.zci._zabbix.get_images(["Cloud_(128)"]))[0]
+        await self.zci._zabbix.update_image(
             {"name": "Cloud_(128) (renamed)", "imageid": image["imageid"]}
         )
 
@@ -107,7 +107,7 @@ class BaseImages:
         self.assertTrue(changed, "Image change not detected")
 
         # Revert changes in Zabbix
-        self.zci._zabbix.update_image(
+        await self.zci._zabbix.update_image(
             {"name": "Cloud_(128)", "imageid": image["imageid"]}
         )
 
@@ -116,7 +116,7 @@ class BaseImages:
         self.assertTrue(changed, "Image was not restored")
 
         # Assert Git version is imported back into Zabbix
-        matches = self.zci._zabbix.get_images(["Cloud_(128) (renamed)"])
+        matches = await self.zci._zabbix.get_images(["Cloud_(128) (renamed)"])
         self.assertEqual(len(matches), 1, "Image not found")
 
     async def asyncTearDown(self):
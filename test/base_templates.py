@@ -76,10 +76,10 @@ class BaseTemplates:
 
     async def test_template_change(self):
         # Rename a template
-        template_id = self.zci._zabbix.get_templates_name(["Windows by Zabbix agent"])[
-            0
-        ]["templateid"]
-        self.zci._zabbix.set_template(
+        template_id = (
+            await self.zci._zabbix.get_templates_name(["Windows by Zabbix agent"])
+        )[0]["templateid"]
+        await self.zci._zabbix.set_template(
             template_id, {"name": "Windows by Zabbix agent (renamed)"}
         )
 
@@ -88,48 +88,56 @@ class BaseTemplates:
         self.assertTrue(changed, "Template change not detected")
 
         # Revert changes in Zabbix
-        self.zci._zabbix.set_template(template_id, {"name": "Windows by Zabbix agent"})
+        await self.zci._zabbix.set_template(
+            template_id, {"name": "Windows by Zabbix agent"}
+        )
 
         # Restore to Git version
         changed = await self.zci.pull()
         self.assertTrue(changed, "Template was not restored")
 
         # Assert Git version is imported back into Zabbix
-        matches = self.zci._zabbix.get_templates(
+        matches = await self.zci._zabbix.get_templates(
             [Settings.ROOT_TEMPLATE_GROUP], ["Windows by Zabbix agent"]
         )
         self.assertEqual(len(matches), 1, "Template not found")
 
     async def test_template_rename(self):
         # Rename a template
-        template_id = self.zci._zabbix.get_templates_name(["Linux by Zabbix agent"])[0][
-            "templateid"
-        ]
-        self.zci._zabbix.set_template(template_id, {"host": "Linux by Zabbix 00000"})
+        template_id = (
+            await self.zci._zabbix.get_templates_name(["Linux by Zabbix agent"])
+        )[0]["templateid"]
+        await self.zci._zabbix.set_template(
+            template_id, {"host": "Linux by Zabbix 00000"}
+        )
 
         # Push changes to git
         changed = await self.zci.push()
         self.assertTrue(changed, "Renaming not detected")
 
         # Make changes in Zabbix
-        self.zci._zabbix.set_template(template_id, {"host": "Linux by Zabbix agent"})
+        await self.zci._zabbix.set_template(
+            template_id, {"host": "Linux by Zabbix agent"}
+        )
 
         # Restore to Git version
         changed = await self.zci.pull()
         self.assertTrue(changed, "Template was not restored")
 
         # Assert Git version is restored
-        matches = self.zci._zabbix.get_templates(
+        matches = await self.zci._zabbix.get_templates(
             [Settings.ROOT_TEMPLATE_GROUP], ["Linux by Zabbix 00000"]
         )
         self.assertEqual(len(matches), 1, "Template not found")
 
     async def test_template_delete(self):
         # Delete a template
-        template_id = self.zci._zabbix.get_templates_name(
-            ["Acronis Cyber Protect Cloud by HTTP"]
+        template_id = (
+            await self.zci._zabbix.get_templates_name(
+                ["Acronis Cyber Protect Cloud by HTTP"]
+            )
         )[0]["templateid"]
-        self.zci._zabbix.delete_templates([template_id])
+        await self.zci._zabbix.delete_templates([template_id])
 
         # Push changes to git
         changed = await self.zci.push()
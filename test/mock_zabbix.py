@@ -0,0 +1,578 @@
+import asyncio
+import copy
+import threading
+import time
+from collections import Counter
+from fnmatch import fnmatch
+from io import StringIO
+
+import pygit2
+from aiohttp import web
+from ruamel.yaml import YAML
+
+yaml = YAML()
+
+# Audit log resource types, matching the Zabbix API
+AUDIT_RESOURCE_IMAGE = 16
+AUDIT_RESOURCE_ITEM = 15
+AUDIT_RESOURCE_TEMPLATE = 30
+AUDIT_RESOURCE_HOST_PROTOTYPE = 37
+AUDIT_RESOURCE_TEMPLATE_GROUP = 50
+
+
+class MockZabbixError(Exception):
+    def __init__(self, message: str, data: str = ""):
+        super().__init__(message)
+        self.message = message
+        self.data = data
+
+
+class MockZabbix:
+    """
+    In-process stand-in for the Zabbix JSON-RPC API, implementing the methods used
+    by ZabbixCI. The server runs on its own event loop in a background thread,
+    zabbix_utils checks the API version with a synchronous request.
+
+    :param version: Zabbix version reported by apiinfo.version
+    :param latency: Seconds added to every HTTP request, to simulate a remote frontend
+    """
+
+    def __init__(self, version: str = "7.0.0", latency: float = 0):
+        self.version = version
+        self.latency = latency
+
+        # Amount of API calls per method, batch requests count every call
+        self.calls: Counter = Counter()
+        self.http_requests = 0
+
+        # Authorization header of the last HTTP request
+        self.authorization: str | None = None
+
+        # Batch requests with more calls are rejected as a whole, like a frontend
+        # rejecting a request that is too large
+        self.max_batch_calls: int | None = None
+        self.rejected_batches = 0
+
+        self.template_groups: dict[str, dict] = {}
+        self.templates: dict[str, dict] = {}
+        # Template ID and export of items, and discovery rule host of host prototypes
+        self.items: dict[str, tuple[str, dict]] = {}
+        self.host_prototypes: dict[str, str] = {}
+        self.images: dict[str, dict] = {}
+        self.icon_maps: dict[str, dict] = {}
+        self.audit: list[dict] = []
+
+        # Names of the images of which image.get returned the image data
+        self.image_downloads: list[str] = []
+
+        self._next_id = 10000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    @property
+    def _export_version(self):
+        return ".".join(self.version.split(".")[0:2])
+
+    @property
+    def _group_key(self):
+        # Zabbix 6.0 exports template groups as (host) groups
+        return "groups" if float(self._export_version) < 6.2 else "template_groups"
+
+    def _id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+
+    def _audit(self, resource_type: int, resource_id: str, action: int) -> None:
+        self.audit.append(
+            {
+                "auditid": self._id(),
+                "userid": "1",
+                "clock": str(int(time.time())),
+                "action": str(action),
+                "resourcetype": str(resource_type),
+                "resourceid": resource_id,
+            }
+        )
+
+    def start(self) -> str:
+        """
+        Start the server on a free local port
+
+        :return: URL of the JSON-RPC endpoint
+        """
+        self._loop = asyncio.new_event_loop()
+
+        app = web.Application(client_max_size=64 * 1024**2)
+        app.router.add_post("/api_jsonrpc.php", self._handle)
+        self._runner = web.AppRunner(app)
+
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/api_jsonrpc.php"
+
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        return self.url
+
+    def stop(self) -> None:
+        if not self._loop or not self._runner:
+            return
+
+        if not self._loop.is_running():
+            return
+
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.http_requests += 1
+        self.authorization = request.headers.get("Authorization")
+        body = await request.json()
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if isinstance(body, list):
+            if self.max_batch_calls is not None and len(body) > self.max_batch_calls:
+                self.rejected_batches += 1
+                return web.json_response(
+                    self._error({}, -32600, "Invalid request.", "Request too large.")
+                )
+
+            return web.json_response([self._dispatch(call) for call in body])
+
+        return web.json_response(self._dispatch(body))
+
+    def _dispatch(self, call: dict) -> dict:
+        method = call["method"]
+        self.calls[method] += 1
+
+        handler = getattr(self, "_" + method.replace(".", "_"), None)
+
+        if handler is None:
+            return self._error(call, -32601, "Method not found.", method)
+
+        try:
+            result = handler(call.get("params") or {})
+        except MockZabbixError as e:
+            return self._error(call, -32602, e.message, e.data)
+
+        return {"jsonrpc": "2.0", "result": result, "id": call.get("id")}
+
+    @staticmethod
+    def _error(call: dict, code: int, message: str, data: str) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "error": {"code": code, "message": message, "data": data},
+            "id": call.get("id"),
+        }
+
+    # Seeding
+
+    def add_template_group(self, name: str, uuid: str = "") -> dict:
+        if name not in self.template_groups:
+            self.template_groups[name] = {
+                "groupid": self._id(),
+                "name": name,
+                "uuid": uuid or f"{len(self.template_groups):032x}",
+            }
+
+        return self.template_groups[name]
+
+    def add_template(
+        self,
+        name: str,
+        groups: list[str],
+        linked: list[str] | None = None,
+        uuid: str = "",
+        items: list[dict] | None = None,
+    ) -> str:
+        """
+        Add a template to the mock, as it would be imported
+
+        :return: Template ID
+        """
+        for group in groups:
+            self.add_template_group(group)
+
+        template: dict = {
+            "uuid": uuid or f"{len(self.templates) + 1:032x}",
+            "template": name,
+            "name": name,
+        }
+
+        if linked:
+            template["templates"] = [{"name": link} for link in linked]
+
+        template["groups"] = [{"name": group} for group in groups]
+
+        template_id = self._id()
+
+        if items:
+            template["items"] = items
+
+            for item in items:
+                self.items[self._id()] = (template_id, item)
+
+        self.templates[template_id] = template
+        return template_id
+
+    def item_id(self, key: str) -> str:
+        return next(
+            item_id for item_id, (_, item) in self.items.items() if item["key"] == key
+        )
+
+    def update_item(self, item_id: str, **changes) -> None:
+        """
+        Change an item of a template, as a user would in the frontend
+        """
+        self.items[item_id][1].update(changes)
+        self._audit(AUDIT_RESOURCE_ITEM, item_id, 1)
+
+    def delete_item(self, item_id: str) -> None:
+        template_id, item = self.items.pop(item_id)
+        self.templates[template_id]["items"].remove(item)
+        self._audit(AUDIT_RESOURCE_ITEM, item_id, 2)
+
+    def add_host_prototype(self, template_id: str) -> str:
+        host_prototype_id = self._id()
+        self.host_prototypes[host_prototype_id] = template_id
+        return host_prototype_id
+
+    def add_image(self, name: str, image: str, imagetype: str = "1") -> str:
+        image_id = self._id()
+        self.images[image_id] = {
+            "imageid": image_id,
+            "name": name,
+            "imagetype": imagetype,
+            "image": image,
+        }
+        return image_id
+
+    # API methods
+
+    def _apiinfo_version(self, params):
+        return self.version
+
+    def _user_login(self, params):
+        return "0424bd59b807674191e7d77572075f33"
+
+    def _user_logout(self, params):
+        return True
+
+    def _user_checkAuthentication(self, params):  # noqa: N802
+        return {
+            "userid": "1",
+            "sessionid": params.get("sessionid") or params.get("token"),
+        }
+
+    def _settings_get(self, params):
+        return {"auditlog_enabled": "1"}
+
+    def _auditlog_get(self, params):
+        resource_types = [
+            str(resource_type)
+            for resource_type in params.get("filter", {}).get("resourcetype", [])
+        ]
+        time_from = int(params.get("time_from", 0))
+
+        return [
+            entry
+            for entry in self.audit
+            if (not resource_types or entry["resourcetype"] in resource_types)
+            and int(entry["clock"]) >= time_from
+        ]
+
+    def _item_get(self, params):
+        return [
+            {"itemid": item_id, "hostid": template_id}
+            for item_id, (template_id, _) in self.items.items()
+            if item_id in [str(i) for i in params.get("itemids", [item_id])]
+        ]
+
+    def _hostprototype_get(self, params):
+        return [
+            {"hostid": host_prototype_id, "discoveryRule": {"hostid": template_id}}
+            for host_prototype_id, template_id in self.host_prototypes.items()
+            if host_prototype_id
+            in [str(i) for i in params.get("hostids", [host_prototype_id])]
+        ]
+
+    def _templategroup_get(self, params):
+        names = params.get("search", {}).get("name", [])
+
+        return [
+            {"groupid": g["groupid"], "name": g["name"], "uuid": g["uuid"]}
+            for g in self.template_groups.values()
+            if not names or any(fnmatch(g["name"], name) for name in names)
+        ]
+
+    _hostgroup_get = _templategroup_get
+
+    def _template_object(self, template_id: str) -> dict:
+        template = self.templates[template_id]
+
+        return {
+            "templateid": template_id,
+            "host": template["template"],
+            "name": template["name"],
+            "uuid": template["uuid"],
+        }
+
+    def _template_get(self, params):
+        group_names = {
+            g["name"]
+            for g in self.template_groups.values()
+            if g["groupid"] in params.get("groupids", [g["groupid"]])
+        }
+        hosts = params.get("filter", {}).get("host")
+        template_ids = params.get("templateids")
+
+        return [
+            self._template_object(template_id)
+            for template_id, template in self.templates.items()
+            if {g["name"] for g in template["groups"]} & group_names
+            and (not hosts or template["template"] in hosts)
+            and (not template_ids or template_id in template_ids)
+        ]
+
+    def _template_update(self, params):
+        updates = params if isinstance(params, list) else [params]
+
+        for update in updates:
+            template_id = str(update["templateid"])
+
+            if template_id not in self.templates:
+                raise MockZabbixError(
+                    "Invalid params.", "No permissions to referred object."
+                )
+
+            template = self.templates[template_id]
+
+            if "host" in update:
+                # Templates linking the template refer to it by its technical name
+                for other in self.templates.values():
+                    for link in other.get("templates", []):
+                        if link["name"] == template["template"]:
+                            link["name"] = update["host"]
+
+                template["template"] = update["host"]
+            if "name" in update:
+                template["name"] = update["name"]
+            if "vendor_name" in update:
+                template.setdefault("vendor", {})["name"] = update["vendor_name"]
+            if "vendor_version" in update:
+                template.setdefault("vendor", {})["version"] = update["vendor_version"]
+
+            self._audit(AUDIT_RESOURCE_TEMPLATE, template_id, 1)
+
+        return {"templateids": [str(u["templateid"]) for u in updates]}
+
+    def _template_delete(self, params):
+        for template_id in params:
+            if str(template_id) not in self.templates:
+                raise MockZabbixError(
+                    "Invalid params.", "No permissions to referred object."
+                )
+
+        for template_id in params:
+            del self.templates[str(template_id)]
+            self._audit(AUDIT_RESOURCE_TEMPLATE, str(template_id), 2)
+
+        return {"templateids": params}
+
+    def _configuration_export(self, params):
+        template_ids = [str(t) for t in params["options"]["templates"]]
+        templates = sorted(
+            [
+                copy.deepcopy(self.templates[t])
+                for t in template_ids
+                if t in self.templates
+            ],
+            key=lambda t: t["template"],
+        )
+
+        group_names = {g["name"] for t in templates for g in t["groups"]}
+
+        export = {
+            "version": self._export_version,
+            self._group_key: [
+                {"uuid": g["uuid"], "name": g["name"]}
+                for g in sorted(self.template_groups.values(), key=lambda g: g["name"])
+                if g["name"] in group_names
+            ],
+        }
+
+        if templates:
+            export["templates"] = templates
+
+        stream = StringIO()
+        yaml.dump({"zabbix_export": export}, stream)
+        return stream.getvalue()
+
+    def _configuration_import(self, params):
+        export = yaml.load(StringIO(params["source"]))["zabbix_export"]
+
+        for group in export.get(self._group_key, []):
+            self.add_template_group(group["name"], group["uuid"])
+
+        imported_names = {t["template"] for t in export.get("templates", [])}
+        existing_names = {t["template"] for t in self.templates.values()}
+
+        for template in export.get("templates", []):
+            for link in template.get("templates", []):
+                if link["name"] not in existing_names | imported_names:
+                    raise MockZabbixError(
+                        "Invalid parameter.",
+                        f'Cannot find template "{link["name"]}" linked to template "{template["template"]}".',
+                    )
+
+        for template in export.get("templates", []):
+            template = copy.deepcopy(dict(template))
+
+            template_id = (
+                next(
+                    (
+                        template_id
+                        for template_id, existing in self.templates.items()
+                        if existing["uuid"] == template["uuid"]
+                        or existing["template"] == template["template"]
+                    ),
+                    None,
+                )
+                or self._id()
+            )
+
+            self.templates[template_id] = template
+            self._audit(AUDIT_RESOURCE_TEMPLATE, template_id, 1)
+
+        return True
+
+    def _image_get(self, params):
+        names = params.get("filter", {}).get("name")
+        image_ids = params.get("imageids")
+        output = params.get("output", "extend")
+
+        images = []
+
+        for image in self.images.values():
+            if names and image["name"] not in names:
+                continue
+            if image_ids and image["imageid"] not in [str(i) for i in image_ids]:
+                continue
+
+            result = {
+                key: value
+                for key, value in image.items()
+                if key != "image" and (output == "extend" or key in output)
+            }
+
+            if params.get("select_image"):
+                result["image"] = image["image"]
+                self.image_downloads.append(image["name"])
+
+            images.append(result)
+
+        return images
+
+    def _image_create(self, params):
+        if any(image["name"] == params["name"] for image in self.images.values()):
+            raise MockZabbixError(
+                "Invalid params.", f'Image "{params["name"]}" already exists.'
+            )
+
+        image_id = self.add_image(params["name"], params["image"], params["imagetype"])
+        self._audit(AUDIT_RESOURCE_IMAGE, image_id, 0)
+        return {"imageids": [image_id]}
+
+    def _image_update(self, params):
+        image_id = str(params["imageid"])
+
+        if image_id not in self.images:
+            raise MockZabbixError(
+                "Invalid params.", "No permissions to referred object."
+            )
+
+        self.images[image_id].update(
+            {key: value for key, value in params.items() if key != "imageid"}
+        )
+        self._audit(AUDIT_RESOURCE_IMAGE, image_id, 1)
+        return {"imageids": [image_id]}
+
+    def _image_delete(self, params):
+        for image_id in params:
+            self.images.pop(str(image_id), None)
+            self._audit(AUDIT_RESOURCE_IMAGE, str(image_id), 2)
+
+        return {"imageids": params}
+
+    def _iconmap_get(self, params):
+        names = params.get("filter", {}).get("name")
+
+        return [
+            copy.deepcopy(icon_map)
+            for icon_map in self.icon_maps.values()
+            if not names or icon_map["name"] in names
+        ]
+
+    def _iconmap_save(self, icon_map_id: str, params: dict) -> dict:
+        mappings = [
+            {
+                "iconmappingid": self._id(),
+                "iconmapid": icon_map_id,
+                "sortorder": str(sortorder),
+                **{key: str(value) for key, value in mapping.items()},
+            }
+            for sortorder, mapping in enumerate(params.get("mappings", []))
+        ]
+
+        self.icon_maps[icon_map_id] = {
+            "iconmapid": icon_map_id,
+            "name": params["name"],
+            "default_iconid": str(params.get("default_iconid", "0")),
+            "mappings": mappings,
+        }
+
+        return {"iconmapids": [icon_map_id]}
+
+    def _iconmap_create(self, params):
+        return self._iconmap_save(self._id(), params)
+
+    def _iconmap_update(self, params):
+        return self._iconmap_save(str(params["iconmapid"]), params)
+
+    def _iconmap_delete(self, params):
+        for icon_map_id in params:
+            self.icon_maps.pop(str(icon_map_id), None)
+
+        return {"iconmapids": params}
+
+
+def create_bare_remote(path: str, branch: str = "main") -> pygit2.Repository:
+    """
+    Create a local bare git repository with an initial commit, used as remote
+    """
+    repository = pygit2.init_repository(path, bare=True)
+    signature = pygit2.Signature("ZabbixCI", "zabbixci@localhost")
+
+    builder = repository.TreeBuilder()
+    builder.insert(
+        "README.md",
+        repository.create_blob(b"# ZabbixCI test remote\n"),
+        pygit2.enums.FileMode.BLOB,
+    )
+
+    repository.create_commit(
+        f"refs/heads/{branch}",
+        signature,
+        signature,
+        "Initial commit",
+        builder.write(),
+        [],
+    )
+    repository.set_head(f"refs/heads/{branch}")
+
+    return repository
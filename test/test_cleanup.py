@@ -0,0 +1,130 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+from test.test_template_split import FULL_EXPORT
+from zabbixci.assets import Template, yaml_backend
+from zabbixci.cache.cache import Cache
+from zabbixci.cache.cleanup import Cleanup
+from zabbixci.cache.manifest import MANIFEST_FILE, Manifest
+from zabbixci.settings import Settings
+
+
+class TestCleanup(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_backup = {
+            key: getattr(Settings, key)
+            for key in [
+                "CACHE_PATH",
+                "SYNC_TEMPLATES",
+                "SYNC_ICONS",
+                "SYNC_BACKGROUNDS",
+                "SYNC_ICON_MAPS",
+                "TEMPLATE_WHITELIST",
+                "TEMPLATE_BLACKLIST",
+            ]
+        }
+
+        Settings.CACHE_PATH = self.tmp.name
+        Settings.SYNC_TEMPLATES = True
+        Settings.SYNC_ICONS = False
+        Settings.SYNC_BACKGROUNDS = False
+        Settings.SYNC_ICON_MAPS = False
+        Settings.TEMPLATE_WHITELIST = ""
+        Settings.TEMPLATE_BLACKLIST = ""
+        Cache(Settings.CACHE_PATH)
+
+    def tearDown(self):
+        for key, value in self.settings_backup.items():
+            setattr(Settings, key, value)
+
+        self.tmp.cleanup()
+
+    def _write(self, path: str, content: str = FULL_EXPORT) -> str:
+        path = os.path.join(Settings.CACHE_PATH, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "w") as file:
+            file.write(content)
+
+        return path
+
+    def test_cleanup_prefixes(self):
+        template = self._write(
+            f"{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+        )
+        git_file = self._write(".git/zabbixci/Switch by SNMP.yaml")
+        readme = self._write("README.md", "# Templates")
+        other = self._write(f"{Settings.TEMPLATE_PREFIX_PATH}/notes.txt", "notes")
+
+        Cleanup.cleanup_cache()
+
+        self.assertFalse(os.path.exists(template))
+        self.assertFalse(os.path.exists(os.path.dirname(template)))
+        self.assertTrue(os.path.exists(git_file))
+        self.assertTrue(os.path.exists(readme))
+        self.assertTrue(os.path.exists(other))
+
+    def test_cleanup_whitelist(self):
+        Settings.TEMPLATE_WHITELIST = "Linux by Zabbix agent"
+
+        template = self._write(
+            f"{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+        )
+
+        Cleanup.cleanup_cache()
+
+        self.assertTrue(os.path.exists(template))
+
+    def test_cleanup_skip_templates(self):
+        template = self._write(
+            f"{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+        )
+
+        Cleanup.cleanup_cache(skip_templates=True)
+
+        self.assertTrue(os.path.exists(template))
+
+    def test_manifest(self):
+        os.makedirs(os.path.join(Settings.CACHE_PATH, ".git"))
+
+        template = Template(
+            yaml_backend.load(StringIO(FULL_EXPORT), round_trip=True)["zabbix_export"]
+        )
+        template.save()
+        Manifest.save()
+
+        self.assertTrue(os.path.exists(Cache.state_path(MANIFEST_FILE)))
+
+        # Read the manifest from disk again
+        Manifest.reset()
+
+        path = os.path.join(
+            Settings.CACHE_PATH,
+            Settings.TEMPLATE_PREFIX_PATH,
+            "Network",
+            "Switch by SNMP.yaml",
+        )
+        entry = Manifest.get(path, "template")
+
+        assert entry is not None
+        self.assertEqual(entry["name"], "Switch by SNMP")
+        self.assertEqual(entry["uuid"], template.uuid)
+
+        # Header read from the manifest, without template groups
+        header = Template.partial_open(path)
+        self.assertEqual((header.name, header.uuid), (template.name, template.uuid))
+        self.assertNotIn("groups", header._template)
+
+        # Changed files are read again
+        with open(path, "a") as file:
+            file.write("\n")
+
+        self.assertIsNone(Manifest.get(path, "template"))
+        self.assertIn("groups", Template.partial_open(path)._template)
+
+        Cleanup.cleanup_cache()
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(Manifest.get(path, "template"))
@@ -4,7 +4,12 @@ from zabbixci.cli import read_args
 from zabbixci.settings import Settings
 
 # Setting keys that are not available as CLI arguments
-IGNORED_KEYS_CLI = ["ZABBIX_KWARGS", "GIT_KWARGS", "ACTION"]
+IGNORED_KEYS_CLI = [
+    "ZABBIX_KWARGS",
+    "ZABBIX_METHOD_TIMEOUTS",
+    "GIT_KWARGS",
+    "ACTION",
+]
 
 
 def check_cli_arg(
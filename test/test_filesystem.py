@@ -0,0 +1,63 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from zabbixci.cache.filesystem import Filesystem
+
+
+class TestFilesystem(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "cache")
+        self.outside = os.path.join(self.tmp.name, "outside")
+
+        os.makedirs(os.path.join(self.root, "templates", "Network"))
+        os.makedirs(self.outside)
+
+        # Symlinked cache directory, as used by relative or linked cache paths
+        self.link = os.path.join(self.tmp.name, "link")
+        os.symlink(self.root, self.link)
+
+    def tearDown(self):
+        Filesystem.clear_resolved_dirs()
+        self.tmp.cleanup()
+
+    def test_within(self):
+        path = os.path.join(self.root, "templates", "Network", "Switch.yaml")
+
+        self.assertTrue(Filesystem.is_within(path, self.root))
+        self.assertTrue(Filesystem.is_within(path, self.link))
+        self.assertTrue(
+            Filesystem.is_within(
+                os.path.join(self.link, "templates", "Switch.yaml"), self.root
+            )
+        )
+        self.assertEqual(
+            Filesystem.resolve_within(path, self.link), os.path.realpath(path)
+        )
+
+    def test_outside(self):
+        self.assertFalse(Filesystem.is_within(self.outside, self.root))
+        self.assertFalse(
+            Filesystem.is_within(
+                os.path.join(self.root, "templates", "..", "..", "outside"), self.root
+            )
+        )
+
+    def test_symlink_escape(self):
+        os.symlink(self.outside, os.path.join(self.root, "templates", "escape"))
+        os.symlink(
+            os.path.join(self.outside, "file.yaml"),
+            os.path.join(self.root, "templates", "file.yaml"),
+        )
+
+        self.assertFalse(
+            Filesystem.is_within(
+                os.path.join(self.root, "templates", "escape", "x.yaml"), self.root
+            )
+        )
+        self.assertFalse(
+            Filesystem.is_within(
+                os.path.join(self.root, "templates", "file.yaml"), self.root
+            )
+        )
@@ -17,8 +17,8 @@ class TestImagesBlacklist(BaseImages, unittest.IsolatedAsyncioTestCase):
         Settings.IMAGE_BLACKLIST = "retigra.*"
 
     async def test_image_delete(self):
-        image_id = self.zci._zabbix.get_images(["retigra_(200)"])[0]["imageid"]
-        self.zci._zabbix.delete_images([image_id])
+        image_id = (await self.zci._zabbix.get_images(["retigra_(200)"]))[0]["imageid"]
+        await self.zci._zabbix.delete_images([image_id])
 
         changed = await self.zci.push()
         self.assertFalse(changed, "Blacklisted image was deleted")
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from zabbixci.zabbix.metrics import ApiMetrics
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.metrics = ApiMetrics()
+
+        for latency in range(1, 101):
+            self.metrics.record("configuration.export", latency / 1000, 100, 2000)
+
+        self.metrics.record("template.get", 0.5, 50, 500, errors=1)
+
+    def test_summary(self):
+        summary = self.metrics.summary()
+
+        self.assertEqual(list(summary), ["configuration.export", "template.get"])
+        self.assertEqual(summary["configuration.export"]["calls"], 100)
+        self.assertEqual(summary["configuration.export"]["response_bytes"], 200000)
+        self.assertAlmostEqual(summary["configuration.export"]["p50"], 0.05)
+        self.assertAlmostEqual(summary["configuration.export"]["p95"], 0.095)
+        self.assertEqual(summary["template.get"]["errors"], 1)
+
+    def test_table(self):
+        rows = self.metrics.table()
+
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(rows[1].startswith("configuration.export"))
+
+    def test_reset(self):
+        self.metrics.reset()
+
+        self.assertEqual(self.metrics.summary(), {})
+        self.assertEqual(self.metrics.table(), [])
@@ -0,0 +1,586 @@
+import asyncio
+import base64
+import gzip
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from zabbix_utils import APINotSupported, AsyncZabbixAPI
+
+from test.mock_zabbix import (
+    AUDIT_RESOURCE_HOST_PROTOTYPE,
+    AUDIT_RESOURCE_TEMPLATE_GROUP,
+    MockZabbix,
+    create_bare_remote,
+)
+from zabbixci import ZabbixCI
+from zabbixci.cache.cache import Cache
+from zabbixci.exceptions import ZabbixError
+from zabbixci.handlers.synchronization.image_synchronization import IMAGE_INDEX_FILE
+from zabbixci.settings import Settings
+from zabbixci.zabbix import Zabbix
+from zabbixci.zabbix.zabbix import PREPARE_REQUEST_ATTRIBUTE
+from zabbixci.zabbix.cassette import Cassette
+
+
+class TestMockZabbix(unittest.IsolatedAsyncioTestCase):
+    """
+    End to end push and pull against a mock Zabbix API and a local bare git
+    repository, runs without network access
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        remote = os.path.join(self.tmp.name, "remote.git")
+        create_bare_remote(remote)
+
+        self.mock = MockZabbix()
+        self.mock.add_template("Module by SNMP", ["Templates/Modules"])
+        self.mock.add_template(
+            "Switch by SNMP", ["Templates/Network"], linked=["Module by SNMP"]
+        )
+        self.mock.add_template("Linux by Zabbix agent", ["Templates/Operating systems"])
+
+        Settings.CACHE_PATH = os.path.join(self.tmp.name, "cache")
+        self.cache = Cache(Settings.CACHE_PATH)
+
+        logging.basicConfig(
+            level=logging.ERROR,
+            format="%(asctime)s - %(name)s - %(message)s",
+        )
+
+        Settings.ZABBIX_URL = self.mock.start()
+        Settings.ZABBIX_TOKEN = "mock"
+        Settings.REMOTE = remote
+        Settings.PULL_BRANCH = "main"
+        Settings.PUSH_BRANCH = "main"
+        Settings.SKIP_VERSION_CHECK = True
+        Settings.REGEX_MATCHING = False
+        Settings.SET_VERSION = False
+        Settings.VENDOR = None
+        Settings.INCREMENTAL_PUSH = False
+        Settings.IMAGE_INCREMENTAL_EXPORT = False
+        Settings.IMAGE_BATCH_BYTES = 8388608
+
+        Settings.SYNC_TEMPLATES = True
+        Settings.SYNC_ICONS = False
+        Settings.SYNC_BACKGROUNDS = False
+        Settings.SYNC_ICON_MAPS = False
+
+        Settings.TEMPLATE_WHITELIST = ""
+        Settings.TEMPLATE_BLACKLIST = ""
+
+        self.zci = ZabbixCI()
+
+    async def asyncSetUp(self):
+        self.zci.create_git()
+        await self.zci.create_zabbix()
+
+    async def test_push_pull(self):
+        changed = await self.zci.push()
+        self.assertTrue(changed, "Initial push not detected")
+
+        self.assertTrue(
+            os.path.exists(
+                f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+            )
+        )
+
+        # No changes when we have just pushed
+        changed = await self.zci.pull()
+        self.assertFalse(changed)
+
+    async def test_unchanged_push(self):
+        await self.zci.push()
+
+        path = f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+        mtime = os.stat(path).st_mtime_ns
+
+        self.mock.templates.pop(
+            next(
+                template_id
+                for template_id, template in self.mock.templates.items()
+                if template["template"] == "Linux by Zabbix agent"
+            )
+        )
+
+        changed = await self.zci.push()
+        self.assertTrue(changed, "Template deletion not detected")
+
+        # Unchanged files are kept as they are, deleted templates are removed
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertFalse(
+            os.path.exists(
+                f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/Operating systems/Linux by Zabbix agent.yaml"
+            )
+        )
+
+    async def test_template_restore(self):
+        await self.zci.push()
+
+        template_ids = [
+            t["templateid"]
+            for t in await self.zci._zabbix.get_templates_name(
+                ["Module by SNMP", "Switch by SNMP"]
+            )
+        ]
+        await self.zci._zabbix.delete_templates(template_ids)
+
+        # Linked templates are imported before the templates that link them
+        changed = await self.zci.pull()
+        self.assertTrue(changed, "Templates were not restored")
+
+        matches = await self.zci._zabbix.get_templates(
+            [Settings.ROOT_TEMPLATE_GROUP], ["Module by SNMP", "Switch by SNMP"]
+        )
+        self.assertEqual(len(matches), 2)
+
+    async def test_template_change(self):
+        await self.zci.push()
+
+        template_id = (
+            await self.zci._zabbix.get_templates_name(["Linux by Zabbix agent"])
+        )[0]["templateid"]
+        await self.zci._zabbix.set_template(
+            template_id, {"name": "Linux by Zabbix agent (renamed)"}
+        )
+
+        changed = await self.zci.push()
+        self.assertTrue(changed, "Template change not detected")
+
+    def _template_path(self, group: str, name: str) -> str:
+        return (
+            f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/{group}/{name}.yaml"
+        )
+
+    async def _incremental_push(self) -> bool:
+        """
+        Push with INCREMENTAL_PUSH, counting the calls of this push only
+        """
+        Settings.INCREMENTAL_PUSH = True
+        self.mock.calls.clear()
+        return await self.zci.push()
+
+    async def test_incremental_push_unchanged(self):
+        await self._incremental_push()
+        self.assertEqual(self.mock.calls["configuration.export"], 3)
+
+        changed = await self._incremental_push()
+        self.assertFalse(changed)
+        self.assertEqual(self.mock.calls["configuration.export"], 0)
+
+    async def test_incremental_push_settings_change(self):
+        Settings.TEMPLATE_BLACKLIST = "Linux by Zabbix agent"
+        await self._incremental_push()
+
+        path = self._template_path("Operating systems", "Linux by Zabbix agent")
+        self.assertFalse(os.path.exists(path))
+
+        Settings.TEMPLATE_BLACKLIST = ""
+
+        changed = await self._incremental_push()
+        self.assertTrue(changed, "Settings change not detected")
+        self.assertEqual(self.mock.calls["configuration.export"], 3)
+        self.assertTrue(os.path.exists(path))
+
+    async def test_incremental_push_version_change(self):
+        await self._incremental_push()
+
+        # Upgrades change the exports of all templates
+        self.mock.version = "7.0.1"
+
+        await self._incremental_push()
+        self.assertEqual(self.mock.calls["configuration.export"], 3)
+
+    async def test_incremental_push_linked_template_renamed(self):
+        await self._incremental_push()
+
+        template_id = (await self.zci._zabbix.get_templates_name(["Module by SNMP"]))[
+            0
+        ]["templateid"]
+        await self.zci._zabbix.set_template(template_id, {"host": "Module by SNMP v2"})
+
+        changed = await self._incremental_push()
+        self.assertTrue(changed, "Template rename not detected")
+
+        # Switch by SNMP links the renamed template and is exported again
+        with open(self._template_path("Network", "Switch by SNMP")) as file:
+            self.assertIn("name: Module by SNMP v2", file.read())
+
+        self.assertFalse(
+            os.path.exists(self._template_path("Modules", "Module by SNMP"))
+        )
+        self.assertTrue(
+            os.path.exists(self._template_path("Modules", "Module by SNMP v2"))
+        )
+
+    async def test_incremental_push_item_change(self):
+        self.mock.add_template(
+            "ICMP Ping",
+            ["Templates/Network"],
+            items=[{"uuid": f"{1:032x}", "name": "ICMP ping", "key": "icmpping"}],
+        )
+
+        await self._incremental_push()
+
+        path = self._template_path("Network", "ICMP Ping")
+        unchanged_path = self._template_path("Network", "Switch by SNMP")
+        mtime = os.stat(unchanged_path).st_mtime_ns
+
+        self.mock.update_item(self.mock.item_id("icmpping"), name="ICMP ping status")
+
+        changed = await self._incremental_push()
+        self.assertTrue(changed, "Item change not detected")
+
+        # Only the template of the item is exported
+        self.assertEqual(self.mock.calls["configuration.export"], 1)
+        self.assertEqual(os.stat(unchanged_path).st_mtime_ns, mtime)
+
+        with open(path) as file:
+            self.assertIn("ICMP ping status", file.read())
+
+    async def test_incremental_push_untraceable_change(self):
+        self.mock.add_template(
+            "ICMP Ping",
+            ["Templates/Network"],
+            items=[{"uuid": f"{1:032x}", "name": "ICMP ping", "key": "icmpping"}],
+        )
+
+        await self._incremental_push()
+
+        # The deleted item can not be traced back to its template
+        self.mock.delete_item(self.mock.item_id("icmpping"))
+
+        changed = await self._incremental_push()
+        self.assertTrue(changed, "Item deletion not detected")
+        self.assertEqual(self.mock.calls["configuration.export"], 4)
+
+        with open(self._template_path("Network", "ICMP Ping")) as file:
+            self.assertNotIn("icmpping", file.read())
+
+    async def test_incremental_push_template_removed(self):
+        await self._incremental_push()
+
+        path = self._template_path("Operating systems", "Linux by Zabbix agent")
+        self.assertTrue(os.path.exists(path))
+
+        templates = await self.zci._zabbix.get_templates_name(["Linux by Zabbix agent"])
+        await self.zci._zabbix.delete_templates([templates[0]["templateid"]])
+
+        changed = await self._incremental_push()
+        self.assertTrue(changed, "Template deletion not detected")
+        self.assertEqual(self.mock.calls["configuration.export"], 0)
+        self.assertFalse(os.path.exists(path))
+
+    async def test_set_version(self):
+        Settings.SET_VERSION = True
+        Settings.VENDOR = "ZabbixCI"
+
+        await self.zci.push()
+
+        # Metadata of all templates is updated in a single call
+        self.assertEqual(self.mock.calls["template.update"], 1)
+
+        versions = [
+            t["vendor"]["version"]
+            for t in self.mock.templates.values()
+            if "vendor" in t
+        ]
+        self.assertEqual(len(versions), 3)
+
+    async def test_image_restore(self):
+        Settings.SYNC_ICONS = True
+        self.mock.add_image("Cloud_(128)", base64.b64encode(b"\x89PNG").decode())
+
+        await self.zci.push()
+
+        self.assertTrue(
+            os.path.exists(
+                f"{Settings.CACHE_PATH}/{Settings.IMAGE_PREFIX_PATH}/icons/Cloud_(128).png"
+            )
+        )
+
+        image_id = (await self.zci._zabbix.get_images(["Cloud_(128)"]))[0]["imageid"]
+        await self.zci._zabbix.delete_images([image_id])
+
+        changed = await self.zci.pull()
+        self.assertTrue(changed, "Image was not restored")
+
+        matches = await self.zci._zabbix.get_images(["Cloud_(128)"])
+        self.assertEqual(len(matches), 1, "Image not found")
+
+    def _image_path(self, name: str) -> str:
+        return f"{Settings.CACHE_PATH}/{Settings.IMAGE_PREFIX_PATH}/icons/{name}.png"
+
+    async def _incremental_image_push(self) -> bool:
+        """
+        Push with IMAGE_INCREMENTAL_EXPORT, tracking the images downloaded by this push
+        """
+        Settings.SYNC_ICONS = True
+        Settings.IMAGE_INCREMENTAL_EXPORT = True
+        self.mock.image_downloads.clear()
+        return await self.zci.push()
+
+    def _add_images(self) -> dict[str, str]:
+        return {
+            name: self.mock.add_image(name, base64.b64encode(content).decode())
+            for name, content in [
+                ("Cloud_(128)", b"\x89PNG cloud"),
+                ("Router_(128)", b"\x89PNG router"),
+            ]
+        }
+
+    async def test_incremental_images_unchanged(self):
+        self._add_images()
+
+        await self._incremental_image_push()
+        self.assertCountEqual(
+            self.mock.image_downloads, ["Cloud_(128)", "Router_(128)"]
+        )
+
+        changed = await self._incremental_image_push()
+        self.assertFalse(changed)
+        self.assertEqual(self.mock.image_downloads, [])
+
+    async def test_incremental_images_changed_in_zabbix(self):
+        image_ids = self._add_images()
+        await self._incremental_image_push()
+
+        self.mock._image_update(
+            {
+                "imageid": image_ids["Cloud_(128)"],
+                "image": base64.b64encode(b"\x89PNG new cloud").decode(),
+            }
+        )
+
+        changed = await self._incremental_image_push()
+        self.assertTrue(changed, "Image change not detected")
+        self.assertEqual(self.mock.image_downloads, ["Cloud_(128)"])
+
+        with open(self._image_path("Cloud_(128)"), "rb") as file:
+            self.assertEqual(file.read(), b"\x89PNG new cloud")
+
+    async def test_incremental_images_changed_in_cache(self):
+        self._add_images()
+        await self._incremental_image_push()
+
+        with open(self._image_path("Router_(128)"), "wb") as file:
+            file.write(b"\x89PNG edited")
+
+        # The edited file does not match the index and is exported again
+        await self._incremental_image_push()
+        self.assertEqual(self.mock.image_downloads, ["Router_(128)"])
+
+        with open(self._image_path("Router_(128)"), "rb") as file:
+            self.assertEqual(file.read(), b"\x89PNG router")
+
+    async def test_incremental_images_deleted_in_zabbix(self):
+        image_ids = self._add_images()
+        await self._incremental_image_push()
+
+        self.mock._image_delete([image_ids["Cloud_(128)"]])
+
+        changed = await self._incremental_image_push()
+        self.assertTrue(changed, "Image deletion not detected")
+        self.assertEqual(self.mock.image_downloads, [])
+        self.assertFalse(os.path.exists(self._image_path("Cloud_(128)")))
+        self.assertTrue(os.path.exists(self._image_path("Router_(128)")))
+
+    async def test_incremental_images_other_zabbix(self):
+        self._add_images()
+        await self._incremental_image_push()
+
+        index = Cache.load_state(IMAGE_INDEX_FILE)
+        Cache.save_state(IMAGE_INDEX_FILE, {**index, "url": "https://other/"})
+
+        await self._incremental_image_push()
+        self.assertCountEqual(
+            self.mock.image_downloads, ["Cloud_(128)", "Router_(128)"]
+        )
+
+    async def test_image_batch_fallback(self):
+        Settings.SYNC_ICONS = True
+        self._add_images()
+
+        await self.zci.push()
+        await self.zci._zabbix.delete_images(list(self.mock.images))
+
+        # The rejected batch is uploaded image by image
+        self.mock.max_batch_calls = 1
+        self.mock.calls.clear()
+
+        changed = await self.zci.pull()
+        self.assertTrue(changed, "Images were not restored")
+        self.assertEqual(self.mock.rejected_batches, 1)
+        self.assertEqual(self.mock.calls["image.create"], 2)
+        self.assertCountEqual(
+            [image["name"] for image in self.mock.images.values()],
+            ["Cloud_(128)", "Router_(128)"],
+        )
+
+    async def test_image_batch_bytes(self):
+        Settings.SYNC_ICONS = True
+        self._add_images()
+
+        await self.zci.push()
+        await self.zci._zabbix.delete_images(list(self.mock.images))
+
+        # Every image exceeds the limit and is uploaded in its own request
+        Settings.IMAGE_BATCH_BYTES = 1
+        self.mock.max_batch_calls = 1
+
+        changed = await self.zci.pull()
+        self.assertTrue(changed, "Images were not restored")
+        self.assertEqual(self.mock.rejected_batches, 0)
+        self.assertEqual(len(self.mock.images), 2)
+
+    async def test_icon_map_batch_fallback(self):
+        Settings.SYNC_ICONS = True
+        Settings.SYNC_ICON_MAPS = True
+        image_ids = self._add_images()
+
+        for name in ["Network", "Servers"]:
+            self.mock._iconmap_create(
+                {
+                    "name": name,
+                    "default_iconid": image_ids["Cloud_(128)"],
+                    "mappings": [
+                        {
+                            "iconid": image_ids["Router_(128)"],
+                            "inventory_link": 1,
+                            "expression": name.lower(),
+                        }
+                    ],
+                }
+            )
+
+        await self.zci.push()
+        self.mock.icon_maps.clear()
+
+        self.mock.max_batch_calls = 1
+        self.mock.calls.clear()
+
+        changed = await self.zci.pull()
+        self.assertTrue(changed, "Icon maps were not restored")
+        self.assertEqual(self.mock.rejected_batches, 1)
+        self.assertEqual(self.mock.calls["iconmap.create"], 2)
+        self.assertCountEqual(
+            [icon_map["name"] for icon_map in self.mock.icon_maps.values()],
+            ["Network", "Servers"],
+        )
+
+    async def test_changed_template_ids(self):
+        zabbix = self.zci._zabbix
+        template_ids = {t["template"]: i for i, t in self.mock.templates.items()}
+
+        host_prototype_id = self.mock.add_host_prototype(template_ids["Module by SNMP"])
+        self.mock._audit(AUDIT_RESOURCE_HOST_PROTOTYPE, host_prototype_id, 1)
+
+        self.assertEqual(
+            await zabbix.get_changed_template_ids(0), {template_ids["Module by SNMP"]}
+        )
+
+        # Renaming a template group changes the exports of all its templates
+        group = self.mock.template_groups["Templates/Network"]
+        self.mock._audit(AUDIT_RESOURCE_TEMPLATE_GROUP, group["groupid"], 1)
+
+        self.assertIsNone(await zabbix.get_changed_template_ids(0))
+
+    async def test_http_authentication(self):
+        zabbix = Zabbix(
+            url=Settings.ZABBIX_URL, http_user="zabbix", http_password="S3cret"
+        )
+        await zabbix.zapi.login(token=Settings.ZABBIX_TOKEN)
+        await zabbix.get_templates([Settings.ROOT_TEMPLATE_GROUP])
+        await zabbix._client_session.close()
+
+        self.assertEqual(
+            self.mock.authorization,
+            "Basic " + base64.b64encode(b"zabbix:S3cret").decode(),
+        )
+
+    async def test_http_authentication_unsupported(self):
+        self.mock.version = "7.2.0"
+
+        with self.assertRaises(APINotSupported):
+            Zabbix(url=Settings.ZABBIX_URL, http_user="zabbix", http_password="S3cret")
+
+    async def test_unsupported_zabbix_utils(self):
+        with mock.patch.object(AsyncZabbixAPI, PREPARE_REQUEST_ATTRIBUTE, create=True):
+            delattr(AsyncZabbixAPI, PREPARE_REQUEST_ATTRIBUTE)
+
+            with self.assertRaisesRegex(ZabbixError, "zabbix_utils"):
+                Zabbix(url=Settings.ZABBIX_URL)
+
+    async def test_cassette_replay(self):
+        path = os.path.join(self.tmp.name, "cassette.jsonl.gz")
+
+        recording = Zabbix(url=Settings.ZABBIX_URL, cassette=Cassette(path, "record"))
+        await recording.zapi.login(token=Settings.ZABBIX_TOKEN)
+        templates = await recording.get_templates([Settings.ROOT_TEMPLATE_GROUP])
+        export = await recording.export_template_async(
+            [t["templateid"] for t in templates]
+        )
+        await recording._client_session.close()
+
+        # Replay without Zabbix
+        self.mock.stop()
+
+        replaying = Zabbix(
+            url=Settings.ZABBIX_URL, cassette=Cassette(path, "replay", time_scale=0)
+        )
+        await replaying.zapi.login(token=Settings.ZABBIX_TOKEN)
+
+        self.assertEqual(
+            await replaying.get_templates([Settings.ROOT_TEMPLATE_GROUP]), templates
+        )
+        self.assertEqual(
+            await replaying.export_template_async([t["templateid"] for t in templates]),
+            export,
+        )
+        await replaying._client_session.close()
+
+    async def test_cassette_redacts_credentials(self):
+        path = os.path.join(self.tmp.name, "cassette.jsonl.gz")
+        session_id = self.mock._user_login({})
+
+        recording = Zabbix(url=Settings.ZABBIX_URL, cassette=Cassette(path, "record"))
+        await recording.zapi.login(user="Admin", password="S3cretPassw0rd")
+        self.assertTrue(await recording.zapi.check_auth())
+        await recording.zapi.logout()
+
+        await recording.zapi.login(token="T0kenS3cret")
+        self.assertTrue(await recording.zapi.check_auth())
+        await recording._client_session.close()
+
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            recorded = file.read()
+
+        for secret in ("S3cretPassw0rd", "T0kenS3cret", session_id):
+            self.assertNotIn(secret, recorded)
+
+        # The redacted recording still replays the authentication requests
+        self.mock.stop()
+
+        replaying = Zabbix(
+            url=Settings.ZABBIX_URL, cassette=Cassette(path, "replay", time_scale=0)
+        )
+        await replaying.zapi.login(user="Admin", password="An0therPassw0rd")
+        self.assertTrue(await replaying.zapi.check_auth())
+        await replaying.zapi.logout()
+        await replaying._client_session.close()
+
+    async def asyncTearDown(self):
+        await self.zci._zabbix.zapi.logout()
+
+        if self.zci._zabbix._client_session:
+            await self.zci._zabbix._client_session.close()
+
+        # Wait a couple of cycles for the session to close
+        await asyncio.sleep(0.25)
+
+    def tearDown(self):
+        self.mock.stop()
+        self.tmp.cleanup()
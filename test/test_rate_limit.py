@@ -0,0 +1,43 @@
+import asyncio
+import time
+from unittest import TestCase
+
+from zabbixci.zabbix.rate_limit import RateLimiter, TokenBucket, is_read_method
+
+
+class TestRateLimit(TestCase):
+    def test_method_budgets(self):
+        self.assertTrue(is_read_method("template.get"))
+        self.assertTrue(is_read_method("configuration.export"))
+        self.assertFalse(is_read_method("configuration.import"))
+        self.assertFalse(is_read_method("template.delete"))
+
+    def test_token_bucket_rate(self):
+        async def acquire_all():
+            bucket = TokenBucket(rate=20, burst=1)
+
+            for _ in range(5):
+                await bucket.acquire()
+
+        start = time.monotonic()
+        asyncio.run(acquire_all())
+
+        # The first request is allowed immediately, the others wait 1/20th second
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_concurrency(self):
+        limiter = RateLimiter(concurrency=2)
+        in_flight = []
+
+        async def request():
+            async with limiter.limit():
+                in_flight.append(1)
+                max_in_flight = len(in_flight)
+                await asyncio.sleep(0.01)
+                in_flight.pop()
+                return max_in_flight
+
+        async def run():
+            return await asyncio.gather(*[request() for _ in range(6)])
+
+        self.assertLessEqual(max(asyncio.run(run())), 2)
@@ -0,0 +1,112 @@
+import asyncio
+from unittest import TestCase
+
+import aiohttp
+from zabbix_utils import APIRequestError, ProcessingError
+
+from zabbixci.exceptions import ZabbixCircuitOpenError
+from zabbixci.zabbix.retry import CircuitBreaker, RetryPolicy, is_idempotent_method
+
+
+class TestRetryPolicy(TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, backoff=0, max_backoff=0)
+        self.attempts = 0
+
+    def _failing_request(self, error: Exception, succeed_after: int | None = None):
+        async def request():
+            self.attempts += 1
+
+            if succeed_after is not None and self.attempts > succeed_after:
+                return "ok"
+
+            raise error
+
+        return request
+
+    def test_transient_error_retried(self):
+        result = asyncio.run(
+            self.policy.run(self._failing_request(aiohttp.ClientConnectionError(), 2))
+        )
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(self.attempts, 3)
+
+    def test_attempts_bounded(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(self.policy.run(self._failing_request(asyncio.TimeoutError())))
+
+        self.assertEqual(self.attempts, 3)
+
+    def test_api_error_not_retried(self):
+        with self.assertRaises(APIRequestError):
+            asyncio.run(
+                self.policy.run(self._failing_request(APIRequestError("Invalid")))
+            )
+
+        self.assertEqual(self.attempts, 1)
+
+    def test_non_idempotent_not_retried_after_sending(self):
+        for error in (
+            asyncio.TimeoutError(),
+            aiohttp.ServerDisconnectedError(),
+            ProcessingError("Unable to parse json"),
+        ):
+            self.attempts = 0
+
+            with self.assertRaises(type(error)):
+                asyncio.run(
+                    self.policy.run(self._failing_request(error), idempotent=False)
+                )
+
+            self.assertEqual(self.attempts, 1)
+
+    def test_non_idempotent_retried_when_unsent(self):
+        error = aiohttp.ClientConnectorError(None, OSError(111, "Connection refused"))
+        result = asyncio.run(
+            self.policy.run(self._failing_request(error, 1), idempotent=False)
+        )
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(self.attempts, 2)
+
+    def test_idempotent_methods(self):
+        for method in (
+            "template.get",
+            "configuration.export",
+            "configuration.import",
+            "template.update",
+        ):
+            self.assertTrue(is_idempotent_method(method), method)
+
+        for method in ("image.create", "iconmap.create", "template.delete"):
+            self.assertFalse(is_idempotent_method(method), method)
+
+    def test_backoff_bounded(self):
+        policy = RetryPolicy(backoff=1, max_backoff=4)
+
+        for attempt in range(1, 10):
+            self.assertLessEqual(policy.delay(attempt), 4)
+
+
+class TestCircuitBreaker(TestCase):
+    def test_circuit_opens(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        policy = RetryPolicy(max_attempts=5, backoff=0, max_backoff=0)
+
+        async def request():
+            raise aiohttp.ClientConnectionError()
+
+        with self.assertRaises(ZabbixCircuitOpenError):
+            asyncio.run(policy.run(request, circuit_breaker))
+
+        self.assertTrue(circuit_breaker.is_open)
+
+    def test_trial_request_closes_circuit(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        circuit_breaker.record_failure()
+        self.assertTrue(circuit_breaker.is_open)
+
+        circuit_breaker.check()
+        circuit_breaker.record_success()
+        self.assertFalse(circuit_breaker.is_open)
@@ -0,0 +1,304 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+from ruamel.yaml import YAML
+
+from zabbixci.assets.template import Template
+from zabbixci.cache.cache import Cache
+from zabbixci.settings import Settings
+
+yaml = YAML()
+
+COMBINED_EXPORT = """zabbix_export:
+  version: '7.0'
+  template_groups:
+    - uuid: 57b7ae836ca64446ba2c296389c009b7
+      name: Templates/Modules
+    - uuid: 7df96b18c230490a9a0a9e2307226338
+      name: Templates/Network
+  templates:
+    - uuid: 0d2a8e8a7d2c4d8a9f0e1c3b5a7d9e1f
+      template: 'Module by SNMP'
+      name: 'Module by SNMP'
+      groups:
+        - name: Templates/Modules
+      valuemaps:
+        - uuid: 5f3c1e9b2a7d4c6e8f0a1b3c5d7e9f1a
+          name: 'Interface status'
+          mappings:
+            - value: '1'
+              newvalue: up
+    - uuid: 2b4d6f8a0c1e3a5c7e9b1d3f5a7c9e0b
+      template: 'Switch by SNMP'
+      name: 'Switch by SNMP'
+      templates:
+        - name: 'Module by SNMP'
+      groups:
+        - name: Templates/Network
+"""
+
+SINGLE_EXPORT = """zabbix_export:
+  version: '7.0'
+  template_groups:
+    - uuid: 7df96b18c230490a9a0a9e2307226338
+      name: Templates/Network
+  templates:
+    - uuid: 2b4d6f8a0c1e3a5c7e9b1d3f5a7c9e0b
+      template: 'Switch by SNMP'
+      name: 'Switch by SNMP'
+      templates:
+        - name: 'Module by SNMP'
+      groups:
+        - name: Templates/Network
+"""
+
+FULL_EXPORT = """zabbix_export:
+  version: '7.0'
+  template_groups:
+  - uuid: 7df96b18c230490a9a0a9e2307226338
+    name: Templates/Network
+  templates:
+  - uuid: 2b4d6f8a0c1e3a5c7e9b1d3f5a7c9e0b
+    template: Switch by SNMP
+    name: Switch by SNMP
+    description: |
+      templates:
+      - items: not a key
+    vendor:
+      name: Zabbix
+      version: 7.0-1
+    templates:
+    - name: Module by SNMP
+    groups:
+    - name: Templates/Network
+    items:
+    - uuid: 0d2a8e8a7d2c4d8a9f0e1c3b5a7d9e1f
+      name: Interface status
+      key: ifOperStatus
+    macros:
+    - macro: '{$SNMP.TIMEOUT}'
+      value: 5m
+  triggers:
+  - uuid: 5f3c1e9b2a7d4c6e8f0a1b3c5d7e9f1a
+    expression: last(/Switch by SNMP/ifOperStatus)=2
+    name: Interface down
+"""
+
+GRAPHS_EXPORT = """zabbix_export:
+  version: '7.0'
+  template_groups:
+    - uuid: 846977d1dfed4968bc5f8bdb363285bc
+      name: 'Templates/Operating systems'
+  templates:
+    - uuid: f8f7908280354f2abeed07dc788c3747
+      template: 'Linux by Zabbix agent'
+      name: 'Linux by Zabbix agent'
+      groups:
+        - name: 'Templates/Operating systems'
+      items:
+        - uuid: 3e5e6a2a9b1c4f8e8d7c6b5a4f3e2d1c
+          name: 'Load average (1m avg)'
+          key: 'system.cpu.load[all,avg1]'
+          value_type: FLOAT
+        - uuid: 9a8b7c6d5e4f4a3b2c1d0e9f8a7b6c5d
+          name: 'Number of CPUs'
+          key: system.cpu.num
+    - uuid: 13b06904a6bf41cbb795e3193d896340
+      template: 'Windows by Zabbix agent'
+      name: 'Windows by Zabbix agent'
+      groups:
+        - name: 'Templates/Operating systems'
+      items:
+        - uuid: 7c6b5a4f3e2d4c1b0a9f8e7d6c5b4a3f
+          name: 'Free memory'
+          key: 'vm.memory.size[free]'
+        - uuid: 2d1c0b9a8f7e4d6c5b4a3f2e1d0c9b8a
+          name: 'Total memory'
+          key: 'vm.memory.size[total]'
+  triggers:
+    - uuid: 1b2c3d4e5f6a4b7c8d9e0f1a2b3c4d5e
+      expression: 'min(/Linux by Zabbix agent/system.cpu.load[all,avg1],5m)/last(/Linux by Zabbix agent/system.cpu.num)>1.5'
+      recovery_mode: RECOVERY_EXPRESSION
+      recovery_expression: 'min(/Linux by Zabbix agent/system.cpu.load[all,avg1],5m)/last(/Linux by Zabbix agent/system.cpu.num)<1'
+      name: 'Load average is too high'
+      priority: AVERAGE
+    - uuid: 5e4d3c2b1a0f4e9d8c7b6a5f4e3d2c1b
+      expression: 'last(/Windows by Zabbix agent/vm.memory.size[free])/last(/Windows by Zabbix agent/vm.memory.size[total])<0.1'
+      name: 'Lack of available memory'
+      priority: AVERAGE
+  graphs:
+    - uuid: 6f5e4d3c2b1a4f0e9d8c7b6a5f4e3d2c
+      name: 'CPU load'
+      ymin_type_1: FIXED
+      graph_items:
+        - color: 199C0D
+          item:
+            host: 'Linux by Zabbix agent'
+            key: 'system.cpu.load[all,avg1]'
+    - uuid: 0e9d8c7b6a5f4e3d2c1b0a9f8e7d6c5b
+      name: 'Memory usage'
+      graph_items:
+        - color: 1A7C11
+          item:
+            host: 'Windows by Zabbix agent'
+            key: 'vm.memory.size[free]'
+        - sortorder: '1'
+          color: F63100
+          item:
+            host: 'Windows by Zabbix agent'
+            key: 'vm.memory.size[total]'
+"""
+
+
+class TestTemplateSplit(TestCase):
+    def test_split_matches_single_export(self):
+        templates = Template.split_export(
+            yaml.load(StringIO(COMBINED_EXPORT))["zabbix_export"]
+        )
+        single = Template(yaml.load(StringIO(SINGLE_EXPORT))["zabbix_export"])
+
+        self.assertIsNotNone(templates)
+        assert templates is not None
+
+        self.assertEqual(
+            [t.name for t in templates], ["Module by SNMP", "Switch by SNMP"]
+        )
+        self.assertEqual(templates[1].export(), single.export())
+        self.assertEqual(templates[1].linked_templates, ["Module by SNMP"])
+        self.assertIn("valuemaps", templates[0]._template)
+
+    def test_split_unattributable_sections(self):
+        export = yaml.load(StringIO(COMBINED_EXPORT))["zabbix_export"]
+        export["triggers"] = [
+            {
+                "uuid": "0",
+                "expression": "last(/Module by SNMP/a)=0 and last(/Switch by SNMP/b)=0",
+            }
+        ]
+
+        self.assertIsNone(Template.split_export(export))
+
+    def test_split_triggers_and_graphs(self):
+        export = yaml.load(StringIO(GRAPHS_EXPORT))["zabbix_export"]
+        templates = Template.split_export(export)
+
+        assert templates is not None
+        linux, windows = templates
+
+        self.assertEqual(linux.name, "Linux by Zabbix agent")
+        self.assertEqual(
+            [trigger["name"] for trigger in linux._export["triggers"]],
+            ["Load average is too high"],
+        )
+        self.assertEqual(
+            [graph["name"] for graph in linux._export["graphs"]], ["CPU load"]
+        )
+        self.assertEqual(
+            [trigger["name"] for trigger in windows._export["triggers"]],
+            ["Lack of available memory"],
+        )
+        self.assertEqual(
+            [graph["name"] for graph in windows._export["graphs"]], ["Memory usage"]
+        )
+
+        combined = Template.combine(templates)
+
+        assert combined is not None
+        self.assertEqual(combined.export(), Template(export).export())
+
+    def test_split_sections_of_single_template(self):
+        export = yaml.load(StringIO(GRAPHS_EXPORT))["zabbix_export"]
+        export["graphs"] = export["graphs"][1:]
+        templates = Template.split_export(export)
+
+        assert templates is not None
+        self.assertNotIn("graphs", templates[0]._export)
+        self.assertEqual(list(templates[1]._export)[-1], "graphs")
+
+    def test_combine_reverses_split(self):
+        export = yaml.load(StringIO(COMBINED_EXPORT))["zabbix_export"]
+        templates = Template.split_export(export)
+
+        assert templates is not None
+        combined = Template.combine(templates)
+
+        assert combined is not None
+        self.assertEqual(combined.export(), Template(export).export())
+
+    def test_combine_different_versions(self):
+        single = yaml.load(StringIO(SINGLE_EXPORT))["zabbix_export"]
+        older = {**single, "version": "6.0"}
+
+        self.assertIsNone(Template.combine([Template(single), Template(older)]))
+
+    def test_partial_open(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Settings.CACHE_PATH
+            Settings.CACHE_PATH = tmp
+            Cache(tmp)
+
+            try:
+                path = os.path.join(tmp, "Switch by SNMP.yaml")
+
+                with open(path, "w") as file:
+                    file.write(FULL_EXPORT)
+
+                template = Template.partial_open(path)
+                full = Template.open(path)
+            finally:
+                Settings.CACHE_PATH = cache_path
+
+        self.assertTrue(template.is_template)
+        self.assertEqual(template.name, full.name)
+        self.assertEqual(template.uuid, full.uuid)
+        self.assertEqual(template.zabbix_version, full.zabbix_version)
+        self.assertEqual(template.truncated_groups, full.truncated_groups)
+        self.assertEqual(template.linked_templates, full.linked_templates)
+        self.assertEqual(template.version, full.version)
+        self.assertEqual(
+            template._template["description"], full._template["description"]
+        )
+
+        # Parsing stops before the large sections of the template
+        self.assertNotIn("items", template._template)
+        self.assertNotIn("macros", template._template)
+        self.assertNotIn("triggers", template._export)
+
+    def test_levels(self):
+        def template(name: str, links: list[str]) -> Template:
+            return Template(
+                {
+                    "version": "7.0",
+                    "templates": [
+                        {
+                            "template": name,
+                            "templates": [{"name": link} for link in links],
+                        }
+                    ],
+                }
+            )
+
+        templates = [
+            template("Switch by SNMP", ["Module by SNMP", "ICMP Ping"]),
+            template("Module by SNMP", ["Generic by SNMP"]),
+            template("ICMP Ping", []),
+            template("Cycle A", ["Cycle B"]),
+            template("Cycle B", ["Cycle A"]),
+            template("Depends on cycle", ["Cycle A"]),
+        ]
+
+        levels, cyclic = Template.levels(templates)
+
+        self.assertEqual(
+            {level: [t.name for t in group] for level, group in levels.items()},
+            {
+                1: ["Module by SNMP", "ICMP Ping"],
+                2: ["Switch by SNMP"],
+            },
+        )
+        self.assertEqual(templates[0].level, 2)
+        self.assertEqual(
+            [t.name for t in cyclic], ["Cycle A", "Cycle B", "Depends on cycle"]
+        )
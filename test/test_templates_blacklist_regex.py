@@ -19,10 +19,12 @@ class TestTemplatesBlacklistRegex(BaseTemplates, unittest.IsolatedAsyncioTestCas
     # Test template deletion with whitelist checks
     async def test_template_delete(self):
         # Delete a template
-        template_id = self.zci._zabbix.get_templates_name(
-            ["Acronis Cyber Protect Cloud by HTTP"]
+        template_id = (
+            await self.zci._zabbix.get_templates_name(
+                ["Acronis Cyber Protect Cloud by HTTP"]
+            )
         )[0]["templateid"]
-        self.zci._zabbix.delete_templates([template_id])
+        await self.zci._zabbix.delete_templates([template_id])
 
         Settings.TEMPLATE_BLACKLIST = r"(Acronis Cyber Protect \w+ \w+ \w+)"
 
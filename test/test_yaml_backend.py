@@ -0,0 +1,118 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+from zabbixci.assets import Template, yaml_backend
+from zabbixci.cache.cache import Cache
+from zabbixci.settings import Settings
+
+TEMPLATE_EXPORT = """zabbix_export:
+  version: '7.0'
+  template_groups:
+  - uuid: 7df96b18c230490a9a0a9e2307226338
+    name: Templates/Network
+  templates:
+  - uuid: 2b4d6f8a0c1e3a5c7e9b1d3f5a7c9e0b
+    template: Switch by SNMP
+    name: Switch by SNMP
+    description: |
+      Multi line description
+        with indentation
+    vendor:
+      name: Zabbix
+      version: 7.0-1
+    groups:
+    - name: Templates/Network
+    items:
+    - uuid: 0d2a8e8a7d2c4d8a9f0e1c3b5a7d9e1f
+      name: Interface status
+      key: ifOperStatus
+      delay: 1m
+      history: 7d
+      value_type: FLOAT
+      status: on
+      enabled: no
+      units: ''
+      precision: 1.50
+      port: 0161
+      timeout: 3
+    macros:
+    - macro: '{$SNMP.TIMEOUT}'
+      value: 5m
+      description: Quoted "description"
+"""
+
+
+class TestYamlBackend(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_backup = (Settings.CACHE_PATH, Settings.YAML_BACKEND)
+
+        Settings.CACHE_PATH = self.tmp.name
+        self.cache = Cache(Settings.CACHE_PATH)
+
+    def tearDown(self):
+        Settings.CACHE_PATH, Settings.YAML_BACKEND = self.settings_backup
+        self.tmp.cleanup()
+
+    def test_backends_match_round_trip(self):
+        expected = yaml_backend.load(StringIO(TEMPLATE_EXPORT), round_trip=True)
+
+        for backend in yaml_backend.YAML_BACKENDS:
+            Settings.YAML_BACKEND = backend
+
+            with self.subTest(backend=yaml_backend.backend()):
+                self.assertEqual(
+                    yaml_backend.load(StringIO(TEMPLATE_EXPORT)),
+                    expected,
+                )
+
+    def test_saved_file_unchanged(self):
+        template = Template(
+            yaml_backend.load(StringIO(TEMPLATE_EXPORT), round_trip=True)[
+                "zabbix_export"
+            ]
+        )
+        template.save()
+
+        path = f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+        self.assertTrue(os.path.exists(path))
+
+        with open(path) as file:
+            saved = file.read()
+
+        self.assertEqual(saved, TEMPLATE_EXPORT)
+
+        # Reopening and saving a template keeps the file byte identical,
+        # the unchanged file is not rewritten
+        mtime = os.stat(path).st_mtime_ns
+        self.assertFalse(Template.open(path, round_trip=True).save())
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+        with open(path) as file:
+            self.assertEqual(file.read(), saved)
+
+        changed = Template.open(path, round_trip=True)
+        changed.set_version("7.0-2")
+        self.assertTrue(changed.save())
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["Switch by SNMP.yaml"])
+
+    def test_fast_open_exports_same_template(self):
+        path = f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/Network/Switch by SNMP.yaml"
+        os.makedirs(os.path.dirname(path))
+
+        with open(path, "w") as file:
+            file.write(TEMPLATE_EXPORT)
+
+        for backend in yaml_backend.YAML_BACKENDS:
+            Settings.YAML_BACKEND = backend
+
+            with self.subTest(backend=yaml_backend.backend()):
+                template = Template.open(path)
+
+                self.assertEqual(template.name, "Switch by SNMP")
+                self.assertEqual(
+                    yaml_backend.load(StringIO(template.export()), round_trip=True),
+                    yaml_backend.load(StringIO(TEMPLATE_EXPORT), round_trip=True),
+                )
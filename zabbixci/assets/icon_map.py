@@ -1,16 +1,16 @@
 import logging
+from io import StringIO
 from typing import TextIO
 
-from ruamel.yaml import YAML
-
+from zabbixci.assets import yaml_backend
 from zabbixci.assets.asset import Asset
 from zabbixci.assets.image import Image
 from zabbixci.cache.cache import Cache
+from zabbixci.cache.manifest import Manifest
 from zabbixci.exceptions import ZabbixIconMissingError
 from zabbixci.settings import Settings
 
 logger = logging.getLogger(__name__)
-yaml = YAML()
 
 
 class IconMapping:
@@ -131,18 +131,29 @@ class IconMap(Asset):
         return f"{self.name}"
 
     def _yaml_dump(self, stream: TextIO):
-        yaml.dump(self.export_dict, stream)
+        yaml_backend.dump(self.export_dict, stream)
 
-    def save(self):
+    def save(self) -> bool:
         Cache.makedirs(
             f"{Settings.CACHE_PATH}/{Settings.ICON_MAP_PREFIX_PATH}/",
         )
 
-        with Cache.open(
-            f"{Settings.CACHE_PATH}/{Settings.ICON_MAP_PREFIX_PATH}/{self.name}.yaml",
-            "w",
-        ) as file:
-            self._yaml_dump(file)
+        stream = StringIO()
+        self._yaml_dump(stream)
+
+        path = f"{Settings.CACHE_PATH}/{Settings.ICON_MAP_PREFIX_PATH}/{self.name}.yaml"
+        content = stream.getvalue().encode("utf-8")
+
+        written = Cache.write_if_changed(path, content)
+        Manifest.record(
+            path,
+            "icon_map",
+            self.name,
+            content=content,
+            default_icon_name=self.default_icon_name,
+        )
+
+        return written
 
     @property
     def export_dict(self):
@@ -201,18 +212,31 @@ class IconMap(Asset):
     @classmethod
     def partial_open(cls, path: str):
         """
-        Load an IconMap object from a file. Without Zabbix instance mappings (ids)
+        Load an IconMap object from a file. Without Zabbix instance mappings (ids),
+        read from the cache manifest when it has a current entry for the file
         """
+        entry = Manifest.get(path, "icon_map")
+
+        if entry:
+            return cls(0, entry["name"], 0, entry["default_icon_name"], [])
+
         with Cache.open(path, "r") as file:
-            icon_map = yaml.load(file)
+            icon_map = yaml_backend.load(file)
 
-            return cls(
-                0,
-                icon_map["name"],
-                0,
-                icon_map["default_icon_name"],
-                [],
-            )
+        Manifest.record(
+            path,
+            "icon_map",
+            icon_map["name"],
+            default_icon_name=icon_map["default_icon_name"],
+        )
+
+        return cls(
+            0,
+            icon_map["name"],
+            0,
+            icon_map["default_icon_name"],
+            [],
+        )
 
     @classmethod
     def open(cls, path: str, images: list[Image]):
@@ -220,7 +244,7 @@ class IconMap(Asset):
         Load an IconMap object from a file.
         """
         with Cache.open(path, "r") as file:
-            icon_map = yaml.load(file)
+            icon_map = yaml_backend.load(file)
 
             default_icon = next(
                 filter(lambda icon: icon.name == icon_map["default_icon_name"], images),
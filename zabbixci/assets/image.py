@@ -5,6 +5,7 @@ import regex
 
 from zabbixci.assets.asset import Asset
 from zabbixci.cache.cache import Cache
+from zabbixci.cache.manifest import Manifest
 from zabbixci.settings import Settings
 
 logger = logging.getLogger(__name__)
@@ -31,18 +32,23 @@ class Image(Asset):
     def _type_folder(self):
         return "icons" if self.type == "icon" else "backgrounds"
 
-    def save(self):
+    @property
+    def cache_path(self):
+        return f"{Settings.CACHE_PATH}/{Settings.IMAGE_PREFIX_PATH}/{self._type_folder}/{self.name}.png"
+
+    def save(self) -> bool:
         name_folders = self.name.split("/")[0:-1]
 
         Cache.makedirs(
             f"{Settings.CACHE_PATH}/{Settings.IMAGE_PREFIX_PATH}/{self._type_folder}/{'/'.join(name_folders)}",
         )
 
-        with Cache.open(
-            f"{Settings.CACHE_PATH}/{Settings.IMAGE_PREFIX_PATH}/{self._type_folder}/{self.name}.png",
-            "wb",
-        ) as file:
-            file.write(self.image)
+        written = Cache.write_if_changed(self.cache_path, self.image)
+        Manifest.record(
+            self.cache_path, "image", self.name, content=self.image, kind=self.type
+        )
+
+        return written
 
     def load(self, path: str):
         with Cache.open(f"{Settings.CACHE_PATH}/{path}/{self.name}.png", "rb") as file:
@@ -75,14 +81,27 @@ class Image(Asset):
     @classmethod
     def open(cls, path: str):
         with Cache.open(path, "rb") as file:
-            # TODO: Validation of path ending with /
-            matches = regex.match(
-                f".*{Settings.IMAGE_PREFIX_PATH}/(icons|backgrounds)/(.*).png", path
-            )
+            image = cls.partial_open(path)
+
+            if image:
+                image.image = file.read()
+
+            return image
+
+    @classmethod
+    def partial_open(cls, path: str):
+        """
+        Create an Image object with the name and type from the path of an image
+        file, without reading the image data
+        """
+        # TODO: Validation of path ending with /
+        matches = regex.match(
+            f".*{Settings.IMAGE_PREFIX_PATH}/(icons|backgrounds)/(.*).png", path
+        )
 
-            if not matches:
-                logger.debug("Skipping invalid image path: %s", path)
-                return None
+        if not matches:
+            logger.debug("Skipping invalid image path: %s", path)
+            return None
 
-            type = "icon" if matches[1] == "icons" else "background"
-            return cls(b64encode(file.read()).decode(), matches[2], type)
+        type = "icon" if matches[1] == "icons" else "background"
+        return cls("", matches[2], type)
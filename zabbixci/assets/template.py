@@ -3,13 +3,34 @@ from io import StringIO
 from typing import TextIO
 
 import regex
-from ruamel.yaml import YAML
 
+from zabbixci.assets import yaml_backend
 from zabbixci.assets.asset import Asset
 from zabbixci.cache import Cache
+from zabbixci.cache.manifest import Manifest
 from zabbixci.settings import Settings
 
-yaml = YAML()
+# Top level export keys that are safe to divide over individual templates
+SPLITTABLE_EXPORT_KEYS = ["version", "date", "template_groups", "groups", "templates"]
+
+# Top level export keys of triggers and graphs, which can reference items of
+# multiple templates. Each entry is divided to the template it references.
+REFERENCING_EXPORT_KEYS = ["triggers", "graphs"]
+
+# Template (host) referenced by an item in a trigger expression: func(/Template/key)
+EXPRESSION_HOST = regex.compile(r"\(\s*/([^/]+)/")
+
+# Template keys read by Template.partial_open, Zabbix exports them before
+# the items, triggers and other large sections of a template
+HEADER_KEYS = [
+    "uuid",
+    "template",
+    "name",
+    "description",
+    "vendor",
+    "templates",
+    "groups",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -146,7 +167,7 @@ class Template(Asset):
         if "date" in prepared_export:
             del prepared_export["date"]
 
-        yaml.dump({"zabbix_export": prepared_export}, stream)
+        yaml_backend.dump({"zabbix_export": prepared_export}, stream)
 
     def _insert_vendor_dict(self):
         """
@@ -184,19 +205,36 @@ class Template(Asset):
         self._export["templates"][0]["vendor"]["version"] = version
         self.new_version = True
 
-    def save(self):
+    def save(self) -> bool:
         """
-        Save the template to the cache
+        Save the template to the cache, files with unchanged content are not rewritten
+
+        :return: True when the file was written
         """
         Cache.makedirs(
             f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/{self.truncated_groups}",
         )
 
-        with Cache.open(
-            f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/{self.truncated_groups}/{self._template['template']}.yaml",
-            "w",
-        ) as file:
-            self._yaml_dump(file)
+        path = f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}/{self.truncated_groups}/{self._template['template']}.yaml"
+        content = self.export().encode("utf-8")
+
+        written = Cache.write_if_changed(path, content)
+        self._record(path, content)
+
+        return written
+
+    def _record(self, path: str, content: bytes | None = None) -> None:
+        """
+        Record the template file in the cache manifest
+        """
+        Manifest.record(
+            path,
+            "template",
+            self.name,
+            self.uuid,
+            content,
+            version=self.zabbix_version,
+        )
 
     def export(self):
         """
@@ -206,25 +244,178 @@ class Template(Asset):
         self._yaml_dump(stream)
         return stream.getvalue()
 
-    def level(self, templates: list):
+    @property
+    def level(self) -> int | None:
+        """
+        Import level of the template, set by Template.levels. Templates only
+        link templates of lower levels.
+        """
+        return self._level
+
+    @staticmethod
+    def levels(
+        templates: list["Template"],
+    ) -> tuple[dict[int, list["Template"]], list["Template"]]:
         """
-        Get the amount of linked levels
+        Group templates in import levels with a topological sort, templates
+        within a level do not link each other. Links to templates outside of
+        the list are assumed to exist in Zabbix.
+
+        :param templates: Templates to import
+
+        :return: Templates per level, starting at 1, and the templates that
+            are part of, or depend on, a cycle of linked templates
         """
-        linked_templates = [t for t in templates if t.name in self.linked_templates]
+        indexes = {template.name: index for index, template in enumerate(templates)}
+        dependents: list[list[int]] = [[] for _ in templates]
+        remaining: list[int] = []
 
-        self._level = (
-            max([template.level(templates) for template in linked_templates] or [0]) + 1
-        )
+        for index, template in enumerate(templates):
+            links = {
+                indexes[link]
+                for link in template.linked_templates
+                if link in indexes and indexes[link] != index
+            }
+            remaining.append(len(links))
 
-        return self._level
+            for link in links:
+                dependents[link].append(index)
+
+        levels: dict[int, list[Template]] = {}
+        current = [index for index, count in enumerate(remaining) if count == 0]
+
+        while current:
+            level = len(levels) + 1
+            levels[level] = [templates[index] for index in current]
+
+            next_level = []
+
+            for index in current:
+                templates[index]._level = level
+
+                for dependent in dependents[index]:
+                    remaining[dependent] -= 1
+
+                    if remaining[dependent] == 0:
+                        next_level.append(dependent)
+
+            current = sorted(next_level)
+
+        cyclic = [templates[index] for index, count in enumerate(remaining) if count]
+
+        return levels, cyclic
 
     @staticmethod
-    def open(path: str):
+    def open(path: str, round_trip: bool = False):
         """
         Open a template from the cache
+
+        :param path: Path of the template file
+        :param round_trip: Keep the YAML formatting, needed when the template is saved again
+        """
+        with Cache.open(path, "r") as file:
+            return Template(
+                yaml_backend.load(file, round_trip=round_trip)["zabbix_export"]
+            )
+
+    @staticmethod
+    def _read_header(file: TextIO) -> str:
+        """
+        Read the lines of an export up to the end of the header of its first
+        template, skipping the large sections that follow
+        """
+        lines: list[str] = []
+        export_indent = None
+        item_indent = None
+        in_templates = False
+
+        for line in file:
+            content = line.lstrip(" ")
+            indent = len(line) - len(content)
+
+            if not content.strip() or content.startswith("#"):
+                lines.append(line)
+                continue
+
+            if export_indent is None and indent > 0:
+                export_indent = indent
+
+            is_item = content.startswith("- ")
+
+            if in_templates:
+                if indent <= (export_indent or 0) and not is_item:
+                    # Next top level section of the export
+                    break
+
+                if is_item and item_indent is None:
+                    item_indent = indent
+                elif is_item and indent == item_indent:
+                    # Start of the second template
+                    break
+                elif (
+                    not is_item
+                    and item_indent is not None
+                    and indent == item_indent + 2
+                    and content.split(":", 1)[0] not in HEADER_KEYS
+                ):
+                    break
+            elif indent == export_indent and content.rstrip() == "templates:":
+                in_templates = True
+
+            lines.append(line)
+
+        return "".join(lines)
+
+    @staticmethod
+    def partial_open(path: str):
         """
+        Open only the header of a template from the cache: the export version,
+        template groups, name, UUID, vendor, links and groups of the template.
+        Enough for validation, but not for importing or saving the template.
+        When the cache manifest has a current entry for the file, the template
+        is created from the manifest with only its name, UUID and export version.
+
+        :param path: Path of the template file
+        """
+        entry = Manifest.get(path, "template")
+
+        if entry:
+            return Template(
+                {
+                    "version": entry["version"],
+                    "templates": [
+                        {
+                            "uuid": entry["uuid"],
+                            "template": entry["name"],
+                            "name": entry["name"],
+                        }
+                    ],
+                }
+            )
+
         with Cache.open(path, "r") as file:
-            return Template(yaml.load(file)["zabbix_export"])
+            header = Template._read_header(file)
+
+        try:
+            export = yaml_backend.load(header)
+        except yaml_backend.YAML_ERRORS:
+            export = None
+
+        if (
+            not isinstance(export, dict)
+            or not isinstance(export.get("zabbix_export"), dict)
+            or not export["zabbix_export"].get("templates")
+        ):
+            # Not in the Zabbix export layout, fall back to reading everything
+            logger.debug("Unable to read template header of %s", path)
+            template = Template.open(path)
+        else:
+            template = Template(export["zabbix_export"])
+
+        if template.is_template:
+            template._record(path)
+
+        return template
 
     @staticmethod
     def from_zabbix(export: dict):
@@ -234,3 +425,114 @@ class Template(Asset):
         # TODO: Prepare dict for export, otherwise remove this method and use the constructor directly
 
         return Template(export)
+
+    @staticmethod
+    def combine(templates: list["Template"]) -> "Template | None":
+        """
+        Combine multiple templates into a single Zabbix export, the reverse of
+        split_export. Template groups are deduplicated.
+
+        :param templates: Templates to combine
+
+        :return: Combined template, None when the templates are exported from
+        different Zabbix versions
+        """
+        if len({template.zabbix_version for template in templates}) > 1:
+            return None
+
+        combined: dict = {}
+
+        for template in templates:
+            for key, value in template._export.items():
+                if not isinstance(value, list):
+                    combined.setdefault(key, value)
+                    continue
+
+                items = combined.setdefault(key, [])
+
+                if key in ["template_groups", "groups"]:
+                    names = [group["name"] for group in items]
+                    items.extend(group for group in value if group["name"] not in names)
+                else:
+                    items.extend(value)
+
+        return Template(combined)
+
+    @staticmethod
+    def _referenced_templates(key: str, entry: dict) -> set[str]:
+        """
+        Names of the templates referenced by a top level trigger or graph
+        """
+        if key == "graphs":
+            return {
+                graph_item["item"]["host"]
+                for graph_item in entry.get("graph_items", [])
+                if "item" in graph_item
+            }
+
+        return {
+            host
+            for expression_key in ["expression", "recovery_expression"]
+            for host in EXPRESSION_HOST.findall(entry.get(expression_key, ""))
+        }
+
+    @staticmethod
+    def split_export(export: dict) -> list["Template"] | None:
+        """
+        Split a Zabbix export of multiple templates into individual templates.
+        Every template keeps its own template groups, value maps and linked templates.
+        Top level triggers and graphs are divided over the templates they reference.
+
+        :param export: Zabbix export (contents of zabbix_export)
+
+        :return: List of templates, None when the export contains sections
+        that can not be attributed to a single template (e.g. multi-template triggers)
+        """
+        if any(
+            key not in SPLITTABLE_EXPORT_KEYS + REFERENCING_EXPORT_KEYS
+            for key in export
+        ):
+            return None
+
+        names = [template["template"] for template in export.get("templates", [])]
+        referencing: dict[str, dict[str, list]] = {name: {} for name in names}
+
+        for key in REFERENCING_EXPORT_KEYS:
+            for entry in export.get(key, []):
+                referenced = Template._referenced_templates(key, entry)
+                owners = [name for name in names if name in referenced]
+
+                if len(owners) != 1:
+                    return None
+
+                referencing[owners[0]].setdefault(key, []).append(entry)
+
+        # Zabbix 6.0 exports template groups as (host) groups
+        group_key = "template_groups" if "template_groups" in export else "groups"
+
+        templates: list[Template] = []
+
+        for template in export.get("templates", []):
+            group_names = [group["name"] for group in template.get("groups", [])]
+
+            # Copy the export to keep the key order of an individual export
+            split = export.copy()
+            split["templates"] = [template]
+
+            if group_key in export:
+                split[group_key] = [
+                    group for group in export[group_key] if group["name"] in group_names
+                ]
+
+            for key in REFERENCING_EXPORT_KEYS:
+                if key not in export:
+                    continue
+
+                if key in referencing[template["template"]]:
+                    split[key] = referencing[template["template"]][key]
+                else:
+                    del split[key]
+
+            templates.append(Template(split))
+
+        return templates
@@ -0,0 +1,151 @@
+import logging
+import re
+from typing import Any, TextIO
+
+from ruamel.yaml import YAML, YAMLError
+
+from zabbixci.settings import Settings
+
+try:
+    import yaml as pyyaml  # type: ignore
+
+    CSafeLoader = pyyaml.CSafeLoader
+    PyYAMLError = pyyaml.YAMLError
+except (ImportError, AttributeError):
+    # PyYAML wheels ship libyaml, source builds without it fall back to ruamel.yaml
+    CSafeLoader = None
+    PyYAMLError = YAMLError
+
+logger = logging.getLogger(__name__)
+
+YAML_BACKENDS = ["auto", "libyaml", "safe", "round-trip"]
+
+# Errors raised by any of the backends
+YAML_ERRORS = (YAMLError, PyYAMLError)
+
+# Round-trip YAML keeps the formatting of exports, such as literal block
+# scalars, so saved files are byte identical to what Zabbix exports
+round_trip_yaml = YAML()
+
+safe_yaml = YAML(typ="safe")
+
+# Implicit resolvers of the YAML 1.2 core schema, matching how ruamel.yaml
+# resolves plain scalars. PyYAML resolves with YAML 1.1 rules otherwise,
+# which would turn values like `on` or `no` into booleans.
+YAML_12_RESOLVERS = [
+    (
+        "tag:yaml.org,2002:bool",
+        r"^(?:true|True|TRUE|false|False|FALSE)$",
+        list("tTfF"),
+    ),
+    (
+        "tag:yaml.org,2002:float",
+        r"""^(?:
+         [-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+        |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+        |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""",
+        list("-+0123456789."),
+    ),
+    (
+        "tag:yaml.org,2002:int",
+        r"""^(?:[-+]?0b[0-1_]+
+        |[-+]?0o?[0-7_]+
+        |[-+]?[0-9_]+
+        |[-+]?0x[0-9a-fA-F_]+)$""",
+        list("-+0123456789"),
+    ),
+    ("tag:yaml.org,2002:merge", r"^(?:<<)$", ["<"]),
+    (
+        "tag:yaml.org,2002:null",
+        r"^(?:~|null|Null|NULL|)$",
+        ["~", "n", "N", ""],
+    ),
+    (
+        "tag:yaml.org,2002:timestamp",
+        r"""^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+        |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+        (?:[Tt]|[ \t]+)[0-9][0-9]?
+        :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+        (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$""",
+        list("0123456789"),
+    ),
+]
+
+
+def _construct_int(loader, node) -> int:
+    """
+    Construct integers without the YAML 1.1 octal and sexagesimal notations
+    """
+    value = loader.construct_scalar(node).replace("_", "")
+    sign = -1 if value[0] == "-" else 1
+    value = value.lstrip("+-")
+
+    for prefix, base in (("0b", 2), ("0x", 16), ("0o", 8)):
+        if value.startswith(prefix):
+            return sign * int(value[2:], base)
+
+    return sign * int(value)
+
+
+if CSafeLoader is not None:
+
+    class LibyamlLoader(CSafeLoader):
+        """
+        libyaml based PyYAML loader resolving scalars with YAML 1.2 rules
+        """
+
+        yaml_implicit_resolvers: dict = {}
+
+    for tag, expression, first in YAML_12_RESOLVERS:
+        LibyamlLoader.add_implicit_resolver(tag, re.compile(expression, re.X), first)
+
+    LibyamlLoader.add_constructor("tag:yaml.org,2002:int", _construct_int)
+
+
+def backend() -> str:
+    """
+    Name of the YAML backend used for reading exports
+    """
+    name = Settings.YAML_BACKEND or "auto"
+
+    if name not in YAML_BACKENDS:
+        logger.warning("Unknown YAML_BACKEND %s, using auto", name)
+        name = "auto"
+
+    if name == "libyaml" and CSafeLoader is None:
+        logger.warning("PyYAML with libyaml is not installed, using safe")
+        name = "safe"
+
+    if name == "auto":
+        name = "libyaml" if CSafeLoader is not None else "safe"
+
+    return name
+
+
+def load(stream: TextIO | str, round_trip: bool = False) -> Any:
+    """
+    Load YAML with the configured backend. The fast backends return plain
+    Python objects without formatting details, use round_trip when the
+    loaded data is saved again.
+
+    :param stream: YAML string or file
+    :param round_trip: Load with the round-trip loader, keeping formatting
+    """
+    name = "round-trip" if round_trip else backend()
+
+    if name == "libyaml":
+        return pyyaml.load(stream, Loader=LibyamlLoader)
+
+    if name == "safe":
+        return safe_yaml.load(stream)
+
+    return round_trip_yaml.load(stream)
+
+
+def dump(data: Any, stream: TextIO) -> None:
+    """
+    Dump YAML in the Zabbix export format
+    """
+    round_trip_yaml.dump(data, stream)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import logging
 import os
 import os.path
@@ -5,12 +7,21 @@ from typing import Self
 
 from zabbixci.cache.filesystem import Filesystem
 
+logger = logging.getLogger(__name__)
+
+# State files of ZabbixCI are stored in the .git directory of the cache,
+# so they are never part of the worktree
+STATE_DIRECTORY = ".git/zabbixci"
+
 
 class Cache(Filesystem):
     _logger = None
     _instance: Self
     _cache_dir: str
 
+    # Files saved since the last reset_marks call, None when not marking
+    _marked: set[str] | None = None
+
     def __new__(cls, *args, **kwargs):
         if not hasattr(cls, "_instance"):
             cls._instance = super(Cache, cls).__new__(cls)
@@ -56,6 +67,108 @@ class Cache(Filesystem):
         cls._ensure_safe_path(path)
         return open(path, mode, encoding="utf-8")
 
+    @classmethod
+    def write_if_changed(cls, path: str, content: bytes) -> bool:
+        """
+        Write content to a file in the cache directory, only when the content
+        differs from the current file. Unchanged files keep their modification
+        time, so Git does not need to hash them again. Files are replaced
+        atomically, readers never see a partially written file.
+
+        :param path: Path of the file
+        :param content: New file content
+
+        :return: True when the file was written
+        """
+        cls._ensure_safe_path(os.path.dirname(path))
+        cls.mark(path)
+
+        try:
+            if os.path.getsize(path) == len(content):
+                with open(path, "rb") as file:
+                    if (
+                        hashlib.sha256(file.read()).digest()
+                        == hashlib.sha256(content).digest()
+                    ):
+                        return False
+        except FileNotFoundError:
+            pass
+
+        temporary_path = os.path.join(
+            os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp"
+        )
+
+        try:
+            with open(temporary_path, "wb") as file:
+                file.write(content)
+
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return True
+
+    @classmethod
+    def state_path(cls, name: str) -> str:
+        """
+        Path of a state file in the cache, see STATE_DIRECTORY
+        """
+        return os.path.join(cls._instance._cache_dir, STATE_DIRECTORY, name)
+
+    @classmethod
+    def load_state(cls, name: str) -> dict:
+        """
+        Load a JSON state file
+
+        :return: Contents of the state file, empty when it is missing or unreadable
+        """
+        path = cls.state_path(name)
+
+        if not cls.exists(path):
+            return {}
+
+        try:
+            with cls.open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning("Unable to read state file %s, ignoring it", name)
+            logger.debug("Error details: %s", e)
+            return {}
+
+    @classmethod
+    def save_state(cls, name: str, state: dict) -> None:
+        """
+        Save a JSON state file, when the .git directory of the cache exists
+        """
+        path = cls.state_path(name)
+
+        if not cls.exists(os.path.join(cls._instance._cache_dir, ".git")):
+            return
+
+        cls.makedirs(os.path.dirname(path))
+        cls.write_if_changed(path, json.dumps(state, sort_keys=True).encode())
+
+    @classmethod
+    def reset_marks(cls) -> None:
+        """
+        Start marking the files that are saved, see is_marked
+        """
+        cls._marked = set()
+
+    @classmethod
+    def mark(cls, path: str) -> None:
+        """
+        Mark a file as live, marked files are kept by the cache cleanup
+        """
+        if cls._marked is not None:
+            cls._marked.add(os.path.abspath(path))
+
+    @classmethod
+    def is_marked(cls, path: str) -> bool:
+        return cls._marked is not None and os.path.abspath(path) in cls._marked
+
     @classmethod
     def makedirs(cls, path):
         """
@@ -1,9 +1,12 @@
 import logging
 import os
+from collections.abc import Callable
 
 from zabbixci.assets.icon_map import IconMap
 from zabbixci.assets.image import Image
 from zabbixci.assets.template import Template
+from zabbixci.cache.cache import Cache
+from zabbixci.cache.manifest import Manifest
 from zabbixci.handlers.validation.icon_map_validation import IconMapValidationHandler
 from zabbixci.handlers.validation.image_validation import ImageValidationHandler
 from zabbixci.handlers.validation.template_validation import TemplateValidationHandler
@@ -24,7 +27,7 @@ class Cleanup:
         if not template_handler.read_validation(file):
             return False
 
-        template = Template.open(file)
+        template = Template.partial_open(file)
 
         if not template or not template.is_template:
             logger.warning("Could not open file %s as a template", file)
@@ -43,6 +46,10 @@ class Cleanup:
         if not Settings.SYNC_ICONS and not Settings.SYNC_BACKGROUNDS:
             return False
 
+        # Unchanged images are kept, stale images are removed during the export
+        if Settings.IMAGE_INCREMENTAL_EXPORT:
+            return False
+
         image_handler = ImageValidationHandler()
 
         file = os.path.join(root, name)
@@ -50,7 +57,7 @@ class Cleanup:
         if not image_handler.read_validation(file):
             return False
 
-        image = Image.open(file)
+        image = Image.partial_open(file)
 
         if not image:
             return False
@@ -86,33 +93,106 @@ class Cleanup:
         return True
 
     @classmethod
-    def cleanup_cache(cls, full: bool = False) -> None:
+    def _cleanup_prefixes(cls, skip_templates: bool) -> list[tuple[str, Callable]]:
+        """
+        Prefix paths of the enabled asset types, with the matcher for the files below them
+        """
+        prefixes: list[tuple[str, Callable]] = []
+
+        if Settings.SYNC_TEMPLATES and not skip_templates:
+            prefixes.append((Settings.TEMPLATE_PREFIX_PATH, cls.match_template_cleanup))
+
+        if Settings.SYNC_ICONS or Settings.SYNC_BACKGROUNDS:
+            prefixes.append((Settings.IMAGE_PREFIX_PATH, cls.match_image_cleanup))
+
+        if Settings.SYNC_ICON_MAPS:
+            prefixes.append((Settings.ICON_MAP_PREFIX_PATH, cls.match_icon_map_cleanup))
+
+        return [
+            (os.path.normpath(os.path.join(Settings.CACHE_PATH, prefix)), matcher)
+            for prefix, matcher in prefixes
+        ]
+
+    @staticmethod
+    def _is_below(path: str, prefix: str) -> bool:
+        return path == prefix or path.startswith(prefix.rstrip(os.sep) + os.sep)
+
+    @classmethod
+    def cleanup_cache(
+        cls, full: bool = False, skip_templates: bool = False, sweep: bool = False
+    ) -> None:
         """
         Clean all .yaml (template) files from the cache directory
 
         If full is True, also remove the .git directory and all other files
+        If skip_templates is True, template files are kept (incremental push)
+        If sweep is True, files marked as live since Cache.reset_marks are kept
         """
-        for root, dirs, files in os.walk(Settings.CACHE_PATH, topdown=False):
-            if f"{Settings.CACHE_PATH}/.git" in root and not full:
+        if full:
+            cls._cleanup_full()
+            return
+
+        prefixes = cls._cleanup_prefixes(skip_templates)
+
+        # Walk every prefix once, prefixes within another prefix are walked with it
+        roots = [
+            root
+            for root in sorted({prefix for prefix, _matcher in prefixes})
+            if not any(
+                root != other and cls._is_below(root, other)
+                for other, _matcher in prefixes
+            )
+        ]
+        directories: list[str] = []
+
+        for walk_root in roots:
+            if not os.path.isdir(walk_root):
                 continue
 
+            for root, dirs, files in os.walk(walk_root):
+                # Never descend into the Git directory
+                dirs[:] = [name for name in dirs if name != ".git"]
+                directories.extend(os.path.join(root, name) for name in dirs)
+
+                matchers = [
+                    matcher
+                    for prefix, matcher in prefixes
+                    if cls._is_below(root, prefix)
+                ]
+
+                for name in files:
+                    if sweep and Cache.is_marked(os.path.join(root, name)):
+                        continue
+
+                    if any(matcher(root, name) for matcher in matchers):
+                        os.remove(os.path.join(root, name))
+                        Manifest.remove(os.path.join(root, name))
+
+            if walk_root != os.path.normpath(Settings.CACHE_PATH):
+                directories.append(walk_root)
+
+        # Remove empty directories, children before their parents
+        for directory in sorted(directories, reverse=True):
+            if os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+
+    @classmethod
+    def _cleanup_full(cls) -> None:
+        """
+        Remove the cache directory, including the .git directory
+        """
+        for root, dirs, files in os.walk(Settings.CACHE_PATH, topdown=False):
             for name in files:
-                if (
-                    full
-                    or cls.match_template_cleanup(root, name)
-                    or cls.match_image_cleanup(root, name)
-                    or cls.match_icon_map_cleanup(root, name)
-                ):
-                    os.remove(os.path.join(root, name))
+                os.remove(os.path.join(root, name))
 
             for name in dirs:
-                if name == ".git" and root == Settings.CACHE_PATH and not full:
-                    continue
-
                 # Remove empty directories
                 if not os.listdir(os.path.join(root, name)):
                     os.rmdir(os.path.join(root, name))
 
-        if full and os.path.exists(Settings.CACHE_PATH):
+        if os.path.exists(Settings.CACHE_PATH):
             os.rmdir(Settings.CACHE_PATH)
             logger.info("Cache directory cleared")
+
+        Manifest.reset()
+        Cache.clear_resolved_dirs()
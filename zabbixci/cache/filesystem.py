@@ -5,14 +5,82 @@ logger = logging.getLogger(__name__)
 
 
 class Filesystem:
+    # Resolved paths of parent directories, such as the cache and prefix directories
+    _resolved_dirs: dict[str, str] = {}
+
     @classmethod
     def real_path(cls, path: str):
         return os.path.realpath(path)
 
+    @classmethod
+    def resolved_dir(cls, path: str) -> str:
+        """
+        Real path of a directory, resolved once and cached
+        """
+        key = os.path.abspath(path)
+        resolved = cls._resolved_dirs.get(key)
+
+        if resolved is None:
+            resolved = cls._resolved_dirs[key] = os.path.realpath(key)
+
+        return resolved
+
+    @classmethod
+    def clear_resolved_dirs(cls) -> None:
+        cls._resolved_dirs.clear()
+
+    @staticmethod
+    def _relative_to(path: str, base: str) -> str | None:
+        if path == base:
+            return ""
+
+        prefix = base.rstrip(os.sep) + os.sep
+        return path[len(prefix) :] if path.startswith(prefix) else None
+
+    @classmethod
+    def resolve_within(cls, child: str, parent: str) -> str | None:
+        """
+        Resolve the real path of a path within another path
+
+        Paths that are within the parent by name are only checked for symbolic
+        links below the parent, the full real path is resolved when a symbolic
+        link or .. is involved.
+
+        :return: The real path of child, None when it is not within parent
+        """
+        real_parent = cls.resolved_dir(parent)
+
+        if ".." not in child.replace(os.sep, "/").split("/"):
+            absolute = os.path.abspath(child)
+
+            for base in (real_parent, os.path.abspath(parent)):
+                relative = cls._relative_to(absolute, base)
+
+                if relative is None:
+                    continue
+
+                current = real_parent
+
+                for part in relative.split(os.sep) if relative else []:
+                    current = os.path.join(current, part)
+
+                    if os.path.islink(current):
+                        break
+                else:
+                    return current
+
+                break
+
+        real_child = os.path.realpath(child)
+
+        if os.path.commonpath([real_parent, real_child]) == real_parent:
+            return real_child
+
+        return None
+
     @classmethod
     def is_within(cls, child: str, parent: str):
         """
         Check if a path is within another path
         """
-        real_path = os.path.realpath(parent)
-        return os.path.commonpath([real_path, os.path.realpath(child)]) == real_path
+        return cls.resolve_within(child, parent) is not None
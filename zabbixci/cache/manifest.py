@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import os
+
+from zabbixci.cache.cache import Cache
+from zabbixci.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# State file of the manifest of the asset files written by ZabbixCI
+MANIFEST_FILE = "manifest.json"
+
+
+class Manifest:
+    """
+    Index of the template, image and icon map files in the cache, recording the
+    asset type, name, UUID and content hash of each file. Cleanup and deletion
+    detection read the name and UUID from the manifest instead of parsing the file.
+
+    Entries are only used while the size and modification time of the file match
+    the recorded values. Missing or stale entries are rebuilt from the file itself.
+    """
+
+    _entries: dict[str, dict] = {}
+    _cache_path: str | None = None
+    _changed = False
+
+    @classmethod
+    def _load(cls) -> None:
+        """
+        Load the manifest of the current cache directory, once per cache directory
+        """
+        if cls._cache_path == Settings.CACHE_PATH:
+            return
+
+        cls._cache_path = Settings.CACHE_PATH
+        cls._entries = Cache.load_state(MANIFEST_FILE)
+        cls._changed = False
+
+    @staticmethod
+    def _key(path: str) -> str:
+        real_path = Cache.resolve_within(path, Settings.CACHE_PATH)
+
+        return os.path.relpath(
+            real_path or Cache.real_path(path), Cache.resolved_dir(Settings.CACHE_PATH)
+        )
+
+    @classmethod
+    def get(cls, path: str, asset_type: str) -> dict | None:
+        """
+        Get the manifest entry of a file, None when the entry is missing or stale
+
+        :param path: Path of the file
+        :param asset_type: Expected asset type: template, image or icon_map
+        """
+        cls._load()
+        entry = cls._entries.get(cls._key(path))
+
+        if not entry or entry["type"] != asset_type:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime"]:
+            return None
+
+        return entry
+
+    @classmethod
+    def record(
+        cls,
+        path: str,
+        asset_type: str,
+        name: str,
+        uuid: str = "",
+        content: bytes | None = None,
+        **fields,
+    ) -> None:
+        """
+        Record a file in the manifest
+
+        :param path: Path of the file
+        :param asset_type: Asset type: template, image or icon_map
+        :param name: Name of the asset
+        :param uuid: UUID of the asset, when it has one
+        :param content: Content of the file, read from the file when not provided
+        :param fields: Additional fields of the asset
+        """
+        cls._load()
+
+        if content is None:
+            with Cache.open(path, "rb") as file:
+                content = file.read()
+
+        stat = os.stat(path)
+
+        entry = {
+            "type": asset_type,
+            "name": name,
+            "uuid": uuid,
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            **fields,
+        }
+
+        if cls._entries.get(cls._key(path)) != entry:
+            cls._entries[cls._key(path)] = entry
+            cls._changed = True
+
+    @classmethod
+    def remove(cls, path: str) -> None:
+        cls._load()
+
+        if cls._entries.pop(cls._key(path), None) is not None:
+            cls._changed = True
+
+    @classmethod
+    def save(cls) -> None:
+        """
+        Save the manifest, dropping entries of files that no longer exist
+        """
+        if cls._cache_path != Settings.CACHE_PATH:
+            return
+
+        for key in list(cls._entries):
+            if not os.path.exists(os.path.join(Settings.CACHE_PATH, key)):
+                del cls._entries[key]
+                cls._changed = True
+
+        if not cls._changed:
+            return
+
+        Cache.save_state(MANIFEST_FILE, cls._entries)
+        cls._changed = False
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Forget the loaded manifest, the next access reads it again
+        """
+        cls._cache_path = None
+        cls._entries = {}
+        cls._changed = False
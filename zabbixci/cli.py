@@ -344,6 +344,10 @@ def read_args(args: list[str] | None = None):
         "--batch-size",
         help="Batch size for Zabbix API export requests",
     )
+    zabbixci_advanced_group.add_argument(
+        "--templates-per-export",
+        help="Amount of templates to export in a single Zabbix API request",
+    )
     zabbixci_advanced_group.add_argument(
         "--ignore-template-version",
         help="Ignore template versions on import, useful for initial import",
@@ -375,6 +379,112 @@ def read_args(args: list[str] | None = None):
         "--ca-bundle",
         help="Path to CA bundle for SSL verification",
     )
+    zabbixci_advanced_group.add_argument(
+        "--import-workers",
+        help="Number of templates of the same level to import into Zabbix simultaneously",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--templates-per-import",
+        help="Amount of templates of the same level to import in a single Zabbix API request",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--image-page-size",
+        help="Number of images to export from Zabbix in a single API request",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--image-batch-bytes",
+        help="Maximum size in bytes of the images uploaded to Zabbix in a single request",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--incremental-push",
+        help="Only export templates changed since the last push, based on the Zabbix audit log",
+        const=True,
+        default=None,
+        type=str2bool,
+        nargs="?",
+        explicit=True,
+    )
+    zabbixci_advanced_group.add_argument(
+        "--full-push-interval",
+        help="Seconds between full template exports when using incremental push, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--image-incremental-export",
+        help="Only export new and changed images from Zabbix, based on the Zabbix audit log",
+        const=True,
+        default=None,
+        type=str2bool,
+        nargs="?",
+        explicit=True,
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-max-attempts",
+        help="Maximum attempts for Zabbix API requests that fail with a transient error",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-retry-delay",
+        help="Base delay in milliseconds between Zabbix API request attempts, doubled for every attempt",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-retry-max-delay",
+        help="Maximum delay in milliseconds between Zabbix API request attempts",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-circuit-breaker-threshold",
+        help="Consecutive failed Zabbix API requests before requests are paused, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-circuit-breaker-timeout",
+        help="Seconds to pause Zabbix API requests after reaching the circuit breaker threshold",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-connection-limit",
+        help="Maximum open connections to the Zabbix API, 0 matches the batch size",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-keepalive-timeout",
+        help="Seconds to keep idle Zabbix API connections open for reuse",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-dns-cache-ttl",
+        help="Seconds to cache DNS lookups of the Zabbix host, 0 disables caching",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-connect-timeout",
+        help="Timeout in seconds for connecting to the Zabbix API, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-read-rate-limit",
+        help="Maximum Zabbix API read requests per second, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-read-concurrency",
+        help="Maximum concurrent Zabbix API read requests, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-write-rate-limit",
+        help="Maximum Zabbix API write requests per second, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-write-concurrency",
+        help="Maximum concurrent Zabbix API write requests, 0 disables",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-cassette",
+        help="Record Zabbix API requests to, or replay them from, this gzip compressed file",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-cassette-mode",
+        help="Record or replay Zabbix API requests with the cassette, one of: record, replay",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--zabbix-cassette-time-scale",
+        help="Percentage of the recorded request duration to wait during replay, 0 replays without delay",
+    )
+    zabbixci_advanced_group.add_argument(
+        "--yaml-backend",
+        help="YAML parser for reading exports from the cache, one of: auto, libyaml, safe, round-trip",
+    )
     zabbixci_advanced_group.add_argument(
         "--regex-matching",
         help="Use regex matching for template and image whitelists and blacklists",
@@ -12,3 +12,7 @@ class ZabbixError(BaseZabbixCIError):
 
 class ZabbixIconMissingError(ZabbixError):
     pass
+
+
+class ZabbixCircuitOpenError(ZabbixError):
+    pass
@@ -4,6 +4,7 @@ from zabbixci.assets.icon_map import IconMap
 from zabbixci.assets.image import Image
 from zabbixci.handlers.validation.icon_map_validation import IconMapValidationHandler
 from zabbixci.settings import Settings
+from zabbixci.zabbix.batch import ZabbixBatch
 from zabbixci.zabbix.zabbix import Zabbix
 
 logger = logging.getLogger(__name__)
@@ -21,7 +22,7 @@ class IconMapHandler(IconMapValidationHandler):
     def __init__(self, zabbix: Zabbix):
         self._zabbix = zabbix
 
-    def icon_map_to_cache(self, images: list[Image]) -> list[IconMap]:
+    async def icon_map_to_cache(self, images: list[Image]) -> list[IconMap]:
         """
         Export Zabbix icon maps to cache.
         """
@@ -40,7 +41,7 @@ class IconMapHandler(IconMapValidationHandler):
             else None
         )
 
-        icon_maps = self._zabbix.get_icon_maps(search)
+        icon_maps = await self._zabbix.get_icon_maps(search)
 
         logger.info("Found %s icon map(s) in Zabbix", len(icon_maps))
 
@@ -57,7 +58,7 @@ class IconMapHandler(IconMapValidationHandler):
 
         return icon_map_objects
 
-    def import_file_changes(
+    async def import_file_changes(
         self,
         changed_files: list[str],
         icon_map_objects: list[IconMap],
@@ -89,7 +90,7 @@ class IconMapHandler(IconMapValidationHandler):
             icon_maps.append(icon_map)
             logger.info("Detected change in image: %s", icon_map.name)
 
-        def __import_icon_map(icon_map: IconMap):
+        def __import_icon_map(icon_map: IconMap, batch: ZabbixBatch | None = None):
             if icon_map.name in [t.name for t in icon_map_objects]:
                 logger.info("Updating: %s", icon_map.name)
 
@@ -101,39 +102,33 @@ class IconMapHandler(IconMapValidationHandler):
                     {
                         "iconmapid": old_icon_map.icon_mapid,
                         **icon_map.zabbix_dict,
-                    }
+                    },
+                    batch=batch,
                 )
             else:
                 logger.info("Creating: %s", icon_map.name)
-                return self._zabbix.create_icon_map(icon_map.zabbix_dict)
+                return self._zabbix.create_icon_map(icon_map.zabbix_dict, batch=batch)
 
-        failed_icon_maps: list[IconMap] = []
+        # Import the icon maps in a single batch request, the icon maps of a
+        # rejected batch are imported separately
+        if not Settings.DRY_RUN:
+            batch = self._zabbix.batch(split_on_failure=True)
 
-        # Import the images
-        for icon_map in icon_maps:
-            if not Settings.DRY_RUN:
-                try:
-                    __import_icon_map(icon_map)
-                except Exception as e:
-                    logger.warning(
-                        "Error importing icon mapping %s, will try to import later",
-                        icon_map.name,
-                    )
-                    logger.debug("Error details: %s", e)
-                    failed_icon_maps.append(icon_map)
-
-        if len(failed_icon_maps):
-            for icon_map in failed_icon_maps:
-                try:
-                    __import_icon_map(icon_map)
-                except Exception as e:
+            for icon_map in icon_maps:
+                __import_icon_map(icon_map, batch)
+
+            responses = await batch.send()
+
+            # Transient failures are already retried by the Zabbix retry policy
+            for icon_map, response in zip(icon_maps, responses, strict=True):
+                if isinstance(response, Exception):
                     logger.error(
-                        "Error importing icon mapping %s: %s", icon_map.name, e
+                        "Error importing icon mapping %s: %s", icon_map.name, response
                     )
 
         return [t.name for t in icon_maps]
 
-    def delete_file_changes(
+    async def delete_file_changes(
         self,
         deleted_files: list[str],
         imported_icon_map_names: list[str],
@@ -187,6 +182,6 @@ class IconMapHandler(IconMapValidationHandler):
 
             if len(icon_map_ids):
                 if not Settings.DRY_RUN:
-                    self._zabbix.delete_icon_maps(icon_map_ids)
+                    await self._zabbix.delete_icon_maps(icon_map_ids)
 
         return deletion_queue
@@ -1,4 +1,7 @@
+import hashlib
 import logging
+import os
+import time
 
 import regex
 
@@ -9,10 +12,14 @@ from zabbixci.handlers.synchronization.imagemagick_synchronization import (
 )
 from zabbixci.handlers.validation.image_validation import ImageValidationHandler
 from zabbixci.settings import Settings
+from zabbixci.zabbix.batch import ZabbixBatch
 from zabbixci.zabbix.zabbix import Zabbix
 
 logger = logging.getLogger(__name__)
 
+# State file of the index of the last image export
+IMAGE_INDEX_FILE = "images.json"
+
 
 class ImageHandler(ImageValidationHandler):
     """
@@ -26,33 +33,177 @@ class ImageHandler(ImageValidationHandler):
     def __init__(self, zabbix: Zabbix):
         self._zabbix = zabbix
 
-    def images_to_cache(self) -> list[Image]:
+    async def images_to_cache(self) -> list[Image]:
         """
-        Export Zabbix images to the cache
+        Export Zabbix images to the cache. Image IDs are listed first, the image
+        data is fetched in pages of IMAGE_PAGE_SIZE images that are saved before
+        the next page is fetched.
+
+        With IMAGE_INCREMENTAL_EXPORT, only the data of new and changed images
+        is fetched. Unchanged images are kept as they are in the cache.
         """
         if not Settings.SYNC_ICONS and not Settings.SYNC_BACKGROUNDS:
             return []
 
-        search = (
-            self.get_whitelist()
-            if not self._use_regex() and self.get_whitelist()
-            else None
-        )
+        started_at = int(time.time())
+
+        # Validation only needs the name and type, skip data of unwanted images
+        zabbix_images = await self.zabbix_images()
+
+        logger.info("Found %s image(s) in Zabbix", len(zabbix_images))
+
+        index = await self._load_image_index() if self._incremental() else {}
+
+        if self._incremental():
+            self._remove_stale_images(zabbix_images)
+
+        unchanged = [
+            image for image in zabbix_images if self._is_unchanged(image, index)
+        ]
+        changed_ids = [
+            image.image_id for image in zabbix_images if image not in unchanged
+        ]
+
+        if unchanged:
+            logger.info(
+                "Skipping %d unchanged image(s), exporting %d",
+                len(unchanged),
+                len(changed_ids),
+            )
+
+        page_size = max(int(Settings.IMAGE_PAGE_SIZE), 1)
+        image_objects = [image.minify() for image in unchanged]
+        image_hashes = {
+            str(image.image_id): index["images"][str(image.image_id)]["sha256"]
+            for image in unchanged
+        }
+
+        for i in range(0, len(changed_ids), page_size):
+            images = await self._zabbix.get_images_by_id(changed_ids[i : i + page_size])
+
+            for image in images:
+                image_object = Image.from_zabbix(image)
+                image_object.save()
+                image_objects.append(image_object.minify())
+                image_hashes[str(image_object.image_id)] = hashlib.sha256(
+                    image_object.image
+                ).hexdigest()
+
+        if self._incremental():
+            self._save_image_index(started_at, image_objects, image_hashes)
+
+        return image_objects
+
+    @staticmethod
+    def _incremental() -> bool:
+        return bool(Settings.IMAGE_INCREMENTAL_EXPORT)
+
+    async def _load_image_index(self) -> dict:
+        """
+        Load the index of the last image export, filtered to images that have
+        not changed in Zabbix since. An empty index results in a full export.
+        """
+        index = Cache.load_state(IMAGE_INDEX_FILE)
+
+        if not index:
+            logger.info("No image index found, exporting all images")
+            return {}
+
+        if index.get("url") != self._zabbix.zapi.url:
+            logger.info("Image index belongs to another Zabbix, exporting all images")
+            return {}
+
+        changed_ids = await self._zabbix.get_changed_image_ids(index["clock"])
+
+        if changed_ids is None:
+            logger.info("Unable to detect changed images, exporting all images")
+            return {}
+
+        logger.debug("Images changed in Zabbix since last export: %s", changed_ids)
+
+        return {
+            **index,
+            "images": {
+                image_id: entry
+                for image_id, entry in index["images"].items()
+                if image_id not in changed_ids
+            },
+        }
 
-        images = self._zabbix.get_images(search)
+    def _is_unchanged(self, image: Image, index: dict) -> bool:
+        """
+        Check if the cached file of an image matches the last export of the image
+        """
+        entry = index.get("images", {}).get(str(image.image_id))
+
+        if not entry or entry["name"] != image.name or entry["type"] != image.type:
+            return False
+
+        if not Cache.exists(image.cache_path):
+            return False
+
+        with Cache.open(image.cache_path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest() == entry["sha256"]
+
+    def _remove_stale_images(self, zabbix_images: list[Image]) -> None:
+        """
+        Remove cached images that no longer exist in Zabbix, the cache is not
+        cleaned up before an incremental export
+        """
+        expected_paths = {
+            Cache.resolve_within(image.cache_path, Settings.CACHE_PATH)
+            for image in zabbix_images
+        }
+
+        for type_folder in ["icons", "backgrounds"]:
+            path = f"{Settings.CACHE_PATH}/{Settings.IMAGE_PREFIX_PATH}/{type_folder}"
+
+            if not Cache.exists(path):
+                continue
+
+            for file in Cache.get_files(path):
+                if not self.read_validation(file) or file in expected_paths:
+                    continue
+
+                if self.object_validation(Image.partial_open(file)):
+                    os.remove(file)
+
+    def _save_image_index(
+        self, clock: int, images: list[Image], image_hashes: dict[str, str]
+    ) -> None:
+        Cache.save_state(
+            IMAGE_INDEX_FILE,
+            {
+                "url": self._zabbix.zapi.url,
+                "clock": clock,
+                "images": {
+                    str(image.image_id): {
+                        "name": image.name,
+                        "type": image.type,
+                        "sha256": image_hashes[str(image.image_id)],
+                    }
+                    for image in images
+                },
+            },
+        )
 
-        logger.info("Found %s image(s) in Zabbix", len(images))
+    async def zabbix_images(self) -> list[Image]:
+        """
+        Get the current Zabbix images without their image data,
+        only needed to match Zabbix image IDs to image names
+        """
+        if not Settings.SYNC_ICONS and not Settings.SYNC_BACKGROUNDS:
+            return []
 
         image_objects = []
 
-        for image in images:
-            image_object = Image.from_zabbix(image)
+        for image in await self._zabbix.get_image_ids():
+            image_object = Image.from_zabbix({**image, "image": ""})
 
             if not self.object_validation(image_object):
                 continue
 
-            image_object.save()
-            image_objects.append(image_object.minify())
+            image_objects.append(image_object)
 
         return image_objects
 
@@ -130,7 +281,7 @@ class ImageHandler(ImageValidationHandler):
         """
         return self._generate_images("backgrounds")
 
-    def import_file_changes(
+    async def import_file_changes(
         self, changed_files: list[str], image_objects: list[Image]
     ) -> list[str]:
         """
@@ -159,10 +310,7 @@ class ImageHandler(ImageValidationHandler):
             images.append(image)
             logger.info("Detected change in image: %s", image.name)
 
-        # Group images by level
-        failed_images: list[Image] = []
-
-        def __import_image(image: Image):
+        def __import_image(image: Image, batch: ZabbixBatch | None = None):
             if image.name in [t.name for t in image_objects]:
                 logger.info("Updating: %s", image.name)
 
@@ -174,35 +322,33 @@ class ImageHandler(ImageValidationHandler):
                     {
                         "imageid": old_image.image_id,
                         "image": image.as_zabbix_dict()["image"],
-                    }
+                    },
+                    batch=batch,
                 )
             else:
                 logger.info("Creating: %s", image.name)
-                return self._zabbix.create_image(image.as_zabbix_dict())
-
-        # Import the images
-        for image in images:
-            if not Settings.DRY_RUN:
-                try:
-                    __import_image(image)
-                except Exception as e:
-                    logger.warning(
-                        "Error importing image %s, will try to import later",
-                        image.name,
-                    )
-                    logger.debug("Error details: %s", e)
-                    failed_images.append(image)
-
-        if len(failed_images):
-            for image in failed_images:
-                try:
-                    __import_image(image)
-                except Exception as e:
-                    logger.error("Error importing image %s: %s", image.name, e)
+                return self._zabbix.create_image(image.as_zabbix_dict(), batch=batch)
+
+        # Import the images, uploads are combined in batch requests of at most
+        # IMAGE_BATCH_BYTES. Images of a rejected batch are uploaded separately.
+        if not Settings.DRY_RUN:
+            batch = self._zabbix.batch(
+                max_bytes=int(Settings.IMAGE_BATCH_BYTES), split_on_failure=True
+            )
+
+            for image in images:
+                __import_image(image, batch)
+
+            responses = await batch.send()
+
+            # Transient failures are already retried by the Zabbix retry policy
+            for image, response in zip(images, responses, strict=True):
+                if isinstance(response, Exception):
+                    logger.error("Error importing image %s: %s", image.name, response)
 
         return [t.name for t in images]
 
-    def delete_file_changes(
+    async def delete_file_changes(
         self,
         deleted_files: list[str],
         imported_image_names: list[str],
@@ -227,7 +373,7 @@ class ImageHandler(ImageValidationHandler):
             if not self.read_validation(file):
                 continue
 
-            image = Image.open(file)
+            image = Image.partial_open(file)
 
             if not image:
                 logger.warning("Could not open to be deleted file: %s", file)
@@ -260,6 +406,6 @@ class ImageHandler(ImageValidationHandler):
 
             if image_ids:
                 if not Settings.DRY_RUN:
-                    self._zabbix.delete_images(image_ids)
+                    await self._zabbix.delete_images(image_ids)
 
         return deletion_queue
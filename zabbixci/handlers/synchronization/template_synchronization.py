@@ -1,11 +1,15 @@
 import asyncio
 import logging
+import os
+import time
 from io import StringIO
 
 from ruamel.yaml import YAML
 from zabbix_utils import APIRequestError, ProcessingError
 
 from zabbixci.assets.template import Template
+from zabbixci.cache.cache import Cache
+from zabbixci.exceptions import ZabbixError
 from zabbixci.handlers.validation.template_validation import TemplateValidationHandler
 from zabbixci.settings import Settings
 from zabbixci.zabbix.zabbix import Zabbix
@@ -13,6 +17,20 @@ from zabbixci.zabbix.zabbix import Zabbix
 logger = logging.getLogger(__name__)
 yaml = YAML()
 
+# State file of the last incremental push
+PUSH_STATE_FILE = "push.json"
+
+# Settings that change which templates are exported or where they are saved,
+# all templates are exported when any of them differs from the last push
+PUSH_STATE_SETTINGS = [
+    "ROOT_TEMPLATE_GROUP",
+    "TEMPLATE_WHITELIST",
+    "TEMPLATE_BLACKLIST",
+    "REGEX_MATCHING",
+    "TEMPLATE_PREFIX_PATH",
+    "IGNORE_TEMPLATE_VERSION",
+]
+
 
 class TemplateHandler(TemplateValidationHandler):
     """
@@ -22,59 +40,234 @@ class TemplateHandler(TemplateValidationHandler):
     """
 
     _zabbix: Zabbix
+    _server_version: str | None = None
+    _push_state: dict | None = None
 
     def __init__(self, zabbix: Zabbix):
         self._zabbix = zabbix
 
+    async def _load_server_version(self) -> None:
+        """
+        Fetch the Zabbix server version, required for template object validation
+        """
+        if self._server_version is None:
+            self._server_version = await self._zabbix.get_server_version()
+
+    async def _export_templates(
+        self, templates: list[dict], semaphore: asyncio.Semaphore
+    ) -> list[dict]:
+        """
+        Export one or more templates in a single request and save them to the cache,
+        limited by the shared semaphore
+
+        :param templates: Zabbix template objects
+        :param semaphore: Semaphore bounding the amount of in-flight exports
+
+        :return: Templates for which the export request failed
+        """
+        async with semaphore:
+            try:
+                response = await self._zabbix.export_template_async(
+                    [t["templateid"] for t in templates]
+                )
+            except Exception as e:
+                logger.warning("Error exporting template: %s", e)
+                return templates
+
+        # Processing happens outside of the semaphore, the next export can start
+        export_yaml = yaml.load(StringIO(response))
+
+        if "templates" not in export_yaml["zabbix_export"]:
+            logger.info("No templates found in Zabbix")
+            return []
+
+        if len(templates) == 1:
+            zabbix_templates = [Template.from_zabbix(export_yaml["zabbix_export"])]
+        else:
+            split_templates = Template.split_export(export_yaml["zabbix_export"])
+
+            if split_templates is None:
+                # Export contains sections that belong to multiple templates,
+                # fall back to exporting the templates individually
+                logger.debug(
+                    "Unable to split export of %d templates, exporting individually",
+                    len(templates),
+                )
+                failed = await asyncio.gather(
+                    *[self._export_templates([t], semaphore) for t in templates]
+                )
+                return [t for failed_templates in failed for t in failed_templates]
+
+            zabbix_templates = split_templates
+
+        for zabbix_template in zabbix_templates:
+            if not self.object_validation(zabbix_template):
+                continue
+
+            zabbix_template.save()
+            logger.info("Exported Zabbix template: %s", zabbix_template.name)
+
+        return []
+
     async def zabbix_export(self, templates: list[dict]):
-        batches = [
-            templates[i : i + Settings.BATCH_SIZE]
-            for i in range(0, len(templates), Settings.BATCH_SIZE)
+        """
+        Export templates from Zabbix, keeping up to BATCH_SIZE exports in flight.
+        A new export is started as soon as any running export finishes.
+        Each export request contains up to TEMPLATES_PER_EXPORT templates.
+
+        :raises ZabbixError: When templates could not be exported
+        """
+        semaphore = asyncio.Semaphore(int(Settings.BATCH_SIZE))
+        per_export = max(int(Settings.TEMPLATES_PER_EXPORT), 1)
+
+        chunks = [
+            templates[i : i + per_export] for i in range(0, len(templates), per_export)
         ]
 
-        failed_exports = []
+        logger.info(
+            "Exporting %d templates in %d requests, %d at a time",
+            len(templates),
+            len(chunks),
+            int(Settings.BATCH_SIZE),
+        )
 
-        for batch_index, batch in enumerate(batches):
-            logger.info("Processing batch %d/%d", batch_index + 1, len(batches))
-            coros = []
-            for t in batch:
-                coros.append(self._zabbix.export_template_async([t["templateid"]]))
+        results = await asyncio.gather(
+            *[self._export_templates(chunk, semaphore) for chunk in chunks]
+        )
 
-            responses = await asyncio.gather(*coros, return_exceptions=True)
+        failed_exports = [template for failed in results for template in failed]
 
-            for index, response in enumerate(responses):
-                if isinstance(response, BaseException):
-                    logger.warning("Error exporting template: %s", response)
+        if failed_exports:
+            # Requests are already retried by the Zabbix retry policy, an incomplete
+            # cache would otherwise show the failed templates as deleted
+            raise ZabbixError(
+                f"Failed to export {len(failed_exports)} "
+                f"{'templates' if len(failed_exports) > 1 else 'template'}: "
+                f"{', '.join(t['host'] for t in failed_exports)}"
+            )
 
-                    # Retry the export
-                    failed_exports.append(batch[index])
-                    continue
+    async def changed_templates(self) -> set[str] | None:
+        """
+        Determine the templates changed in Zabbix since the last incremental push,
+        based on the Zabbix audit log. A full export is needed when there is no
+        previous state, the settings or Zabbix version changed, FULL_PUSH_INTERVAL
+        has passed or the audit log can not be used.
 
-                export_yaml = yaml.load(StringIO(response["result"]))
+        :return: Set of changed template IDs, None when all templates should be exported
+        """
+        previous = Cache.load_state(PUSH_STATE_FILE)
 
-                if "templates" not in export_yaml["zabbix_export"]:
-                    logger.info("No templates found in Zabbix")
-                    return
+        if not Settings.SYNC_TEMPLATES:
+            return None
 
-                zabbix_template = Template.from_zabbix(export_yaml["zabbix_export"])
+        await self._load_server_version()
 
-                if not self.object_validation(zabbix_template):
-                    continue
+        self._push_state = {
+            "url": self._zabbix.zapi.url,
+            "branch": Settings.PUSH_BRANCH,
+            "clock": int(time.time()),
+            "full_clock": int(time.time()),
+            # Upgrades change every export without an entry in the audit log
+            "server_version": self._server_version,
+            "settings": {key: getattr(Settings, key) for key in PUSH_STATE_SETTINGS},
+        }
 
-                zabbix_template.save()
-                logger.info("Exported Zabbix template: %s", zabbix_template.name)
+        if (
+            previous.get("url") != self._push_state["url"]
+            or previous.get("branch") != self._push_state["branch"]
+        ):
+            logger.info("No previous incremental push found, exporting all templates")
+            return None
 
-        if failed_exports:
-            logger.warning(
-                "Failed to export %d %s, retrying",
-                len(failed_exports),
-                "templates" if (len(failed_exports) > 1) else "template",
+        if (
+            previous.get("server_version") != self._push_state["server_version"]
+            or previous.get("settings") != self._push_state["settings"]
+        ):
+            logger.info(
+                "Settings or Zabbix version changed since last push, "
+                "exporting all templates"
             )
-            await self.zabbix_export(failed_exports)
+            return None
+
+        if int(Settings.FULL_PUSH_INTERVAL) and time.time() - previous[
+            "full_clock"
+        ] >= int(Settings.FULL_PUSH_INTERVAL):
+            logger.info("Full push interval has passed, exporting all templates")
+            return None
+
+        changed_template_ids = await self._zabbix.get_changed_template_ids(
+            previous["clock"]
+        )
+
+        if changed_template_ids is None:
+            logger.info("Unable to detect changed templates, exporting all templates")
+            return None
+
+        # Keep the time of the last full export
+        self._push_state["full_clock"] = previous["full_clock"]
+
+        logger.debug("Templates changed since last push: %s", changed_template_ids)
+        return changed_template_ids
+
+    def save_push_state(self) -> None:
+        """
+        Save the state of a successful incremental push, the next push only
+        exports templates changed after this push started
+        """
+        if self._push_state is None or Settings.DRY_RUN:
+            return
+
+        Cache.save_state(PUSH_STATE_FILE, self._push_state)
+
+    def _cached_templates(self) -> dict[str, Template]:
+        """
+        Cached templates matching the settings, by file path
+        """
+        path = f"{Settings.CACHE_PATH}/{Settings.TEMPLATE_PREFIX_PATH}"
+        cached: dict[str, Template] = {}
+
+        if not Cache.exists(path):
+            return cached
+
+        for file in Cache.get_files(path):
+            if not self.read_validation(file):
+                continue
+
+            template = Template.partial_open(file)
+
+            if not template or not template.is_template:
+                continue
+
+            # Validation without the version check, matching the cache cleanup
+            if not TemplateValidationHandler.object_validation(self, template):
+                continue
+
+            cached[file] = template
+
+        return cached
+
+    @staticmethod
+    def _remove_cached_templates(
+        cached: dict[str, Template], keep_names: set[str]
+    ) -> None:
+        """
+        Remove cached templates that are not in keep_names, used instead of a
+        full cache cleanup when only changed templates are exported
+        """
+        for file, template in cached.items():
+            if template.name not in keep_names:
+                os.remove(file)
 
-    async def templates_to_cache(self) -> list[dict]:
+    async def templates_to_cache(
+        self, changed_template_ids: set[str] | None = None
+    ) -> list[dict]:
         """
         Export Zabbix templates to the cache
+
+        :param changed_template_ids: Only export these templates and keep other
+            cached templates, when None all templates are exported
+
+        :return: All Zabbix templates matching the settings
         """
         if not Settings.SYNC_TEMPLATES:
             return []
@@ -84,12 +277,55 @@ class TemplateHandler(TemplateValidationHandler):
             if not self._use_regex() and self.get_whitelist()
             else None
         )
-        templates = self._zabbix.get_templates([Settings.ROOT_TEMPLATE_GROUP], search)
+        templates = await self._zabbix.get_templates(
+            [Settings.ROOT_TEMPLATE_GROUP], search
+        )
 
         logger.info("Found %d templates in Zabbix", len(templates))
         logger.debug("Found Zabbix templates: %s", [t["host"] for t in templates])
 
-        await self.zabbix_export(templates)
+        await self._load_server_version()
+
+        if changed_template_ids is None:
+            await self.zabbix_export(templates)
+            return templates
+
+        changed_templates = [
+            t for t in templates if str(t["templateid"]) in changed_template_ids
+        ]
+
+        cached = self._cached_templates()
+        cached_names = {template.uuid: template.name for template in cached.values()}
+
+        # Changed templates are removed first, their name or path may have changed
+        self._remove_cached_templates(
+            cached, {t["host"] for t in templates if t not in changed_templates}
+        )
+
+        # Other templates refer to templates by name, in linked templates and
+        # trigger dependencies. A renamed template changes their exports.
+        renamed = [
+            t["host"]
+            for t in changed_templates
+            if cached_names.get(t.get("uuid"), t["host"]) != t["host"]
+        ]
+
+        if renamed:
+            logger.info(
+                "Templates renamed in Zabbix, exporting all templates: %s",
+                ", ".join(renamed),
+            )
+            changed_templates = templates
+
+        logger.info(
+            "Exporting %d changed templates, %d unchanged",
+            len(changed_templates),
+            len(templates) - len(changed_templates),
+        )
+
+        if changed_templates:
+            await self.zabbix_export(changed_templates)
+
         return templates
 
     def object_validation(self, template) -> bool:
@@ -99,7 +335,10 @@ class TemplateHandler(TemplateValidationHandler):
         if not super().object_validation(template):
             return False
 
-        zabbix_version = self._zabbix.get_server_version()
+        if self._server_version is None:
+            raise ValueError("Zabbix server version has not been loaded")
+
+        zabbix_version = self._server_version
 
         if (
             not Settings.IGNORE_TEMPLATE_VERSION
@@ -116,12 +355,14 @@ class TemplateHandler(TemplateValidationHandler):
 
         return True
 
-    def import_file_changes(
+    async def import_file_changes(
         self, changed_files: list[str]
     ) -> tuple[list[str], list[str]]:
         """
         Import templates into Zabbix based on changed files.
         Changes are parsed and validated before importing.
+        Templates of the same level are imported concurrently by IMPORT_WORKERS workers,
+        combining up to TEMPLATES_PER_IMPORT templates in a single import.
 
         :param changed_files: List of changed files
 
@@ -132,6 +373,8 @@ class TemplateHandler(TemplateValidationHandler):
         if Settings.SYNC_TEMPLATES is False:
             return ([], [])
 
+        await self._load_server_version()
+
         for file in changed_files:
             if not self.read_validation(file):
                 continue
@@ -148,57 +391,180 @@ class TemplateHandler(TemplateValidationHandler):
             templates.append(template)
             logger.info("Detected change in template: %s", template.name)
 
-        # Group templates by level
-        templates = sorted(templates, key=lambda tl: tl.level(templates))
+        # Group templates by level, templates within a level do not depend on each other
+        levels, cyclic_templates = Template.levels(templates)
 
         retry_templates: list[Template] = []
         success_templates: list[str] = []
         failed_templates: list[str] = []
 
-        # Import the templates
+        for template in cyclic_templates:
+            logger.error(
+                "Template %s is part of, or links to, a cycle of linked templates: %s",
+                template.name,
+                ", ".join(template.linked_templates),
+            )
+            failed_templates.extend(template.template_ids)
+
+        await self._report_missing_links(templates)
+
+        semaphore = asyncio.Semaphore(max(int(Settings.IMPORT_WORKERS), 1))
+        per_import = max(int(Settings.TEMPLATES_PER_IMPORT), 1)
+
+        # Import the templates, a level is imported after the previous level finished
         if not Settings.DRY_RUN:
-            for template in templates:
-                try:
-                    logger.info(
-                        "Importing %s, level %d",
-                        template.name,
-                        template.level(templates),
-                    )
-                    self._zabbix.import_template(template)
+            for level in sorted(levels):
+                logger.debug(
+                    "Importing %d templates at level %d", len(levels[level]), level
+                )
+
+                chunks = [
+                    levels[level][i : i + per_import]
+                    for i in range(0, len(levels[level]), per_import)
+                ]
+
+                results = await asyncio.gather(
+                    *[
+                        self._import_templates(chunk, level, semaphore)
+                        for chunk in chunks
+                    ]
+                )
+                errors = [error for result in results for error in result]
+
+                for template, error in zip(levels[level], errors, strict=True):
+                    if error is None:
+                        success_templates.extend(template.template_ids)
+                        continue
 
-                    success_templates.extend(template.template_ids)
-                except (APIRequestError, ProcessingError) as e:
                     logger.warning(
                         "Error importing template %s, will try to import later",
                         template.name,
                     )
-                    logger.debug("Error details: %s", e)
+                    logger.debug("Error details: %s", error)
                     retry_templates.append(template)
         else:
             # Dry-run is enabled, don't import but increment success count
             success_templates.extend(
-                [t.template_ids for t in templates if t.template_ids]
+                [
+                    uuid
+                    for t in templates
+                    if t not in cyclic_templates
+                    for uuid in t.template_ids
+                ]
             )
 
+        # Templates can fail on a dependency that is imported later in the same run,
+        # transient failures are already retried by the Zabbix retry policy
         if retry_templates:
             for template in retry_templates:
-                try:
-                    logger.info(
-                        "Importing %s, level %d after previous failure",
-                        template.name,
-                        template.level(templates),
-                    )
-                    self._zabbix.import_template(template)
+                error = await self._import_template(
+                    template, template.level or 0, semaphore, retry=True
+                )
 
+                if error is None:
                     success_templates.extend(template.template_ids)
-                except (APIRequestError, ProcessingError) as e:
-                    logger.error("Error importing template %s: %s", template, e)
+                else:
+                    logger.error("Error importing template %s: %s", template, error)
 
                     failed_templates.extend(template.template_ids)
 
         return (success_templates, failed_templates)
 
-    def delete_file_changes(
+    async def _report_missing_links(self, templates: list[Template]) -> None:
+        """
+        Log linked templates that are not imported and do not exist in Zabbix,
+        importing templates that link them will fail
+        """
+        names = {template.name for template in templates}
+        links = {
+            link
+            for template in templates
+            for link in template.linked_templates
+            if link not in names
+        }
+
+        if not links:
+            return
+
+        existing = {
+            template["host"]
+            for template in await self._zabbix.get_templates_name(sorted(links))
+        }
+
+        for template in templates:
+            missing = [
+                link
+                for link in template.linked_templates
+                if link in links and link not in existing
+            ]
+
+            if missing:
+                logger.error(
+                    "Template %s links template(s) that do not exist in Zabbix: %s",
+                    template.name,
+                    ", ".join(missing),
+                )
+
+    async def _import_templates(
+        self, templates: list[Template], level: int, semaphore: asyncio.Semaphore
+    ) -> list[Exception | None]:
+        """
+        Import templates of the same level in a single combined import. When the
+        combined import fails, the templates are imported individually to find
+        the templates that cause the failure.
+
+        :return: The error per template, None for imported templates
+        """
+        combined = Template.combine(templates) if len(templates) > 1 else None
+
+        if combined is not None:
+            async with semaphore:
+                logger.info(
+                    "Importing %s, level %d",
+                    ", ".join(template.name for template in templates),
+                    level,
+                )
+
+                try:
+                    await self._zabbix.import_template(combined)
+                    return [None] * len(templates)
+                except (APIRequestError, ProcessingError) as e:
+                    logger.debug(
+                        "Combined import failed, importing individually: %s", e
+                    )
+
+        return await asyncio.gather(
+            *[self._import_template(t, level, semaphore) for t in templates]
+        )
+
+    async def _import_template(
+        self,
+        template: Template,
+        level: int,
+        semaphore: asyncio.Semaphore,
+        retry: bool = False,
+    ) -> Exception | None:
+        """
+        Import a single template, limited by the shared semaphore
+
+        :return: The error when the import failed, otherwise None
+        """
+        async with semaphore:
+            logger.info(
+                "Importing %s, level %d%s",
+                template.name,
+                level,
+                " after previous failure" if retry else "",
+            )
+
+            try:
+                await self._zabbix.import_template(template)
+            except (APIRequestError, ProcessingError) as e:
+                return e
+
+        return None
+
+    async def delete_file_changes(
         self,
         deleted_files: list[str],
         imported_template_ids: list[str],
@@ -216,6 +582,8 @@ class TemplateHandler(TemplateValidationHandler):
         if Settings.SYNC_TEMPLATES is False:
             return []
 
+        await self._load_server_version()
+
         deletion_queue: list[str] = []
 
         # Check if deleted files are templates and if they are imported, if not add to deletion queue
@@ -223,7 +591,7 @@ class TemplateHandler(TemplateValidationHandler):
             if not self.read_validation(file):
                 continue
 
-            template = Template.open(file)
+            template = Template.partial_open(file)
 
             if not template or not template.is_template:
                 logger.warning("Could not open to be deleted file: %s", file)
@@ -256,6 +624,6 @@ class TemplateHandler(TemplateValidationHandler):
 
             if len(template_ids):
                 if not Settings.DRY_RUN:
-                    self._zabbix.delete_templates(template_ids)
+                    await self._zabbix.delete_templates(template_ids)
 
         return deletion_queue
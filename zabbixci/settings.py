@@ -28,6 +28,14 @@ class Settings:
     TEMPLATE_BLACKLIST: str = ""
     CACHE_PATH: str = "./cache"
     BATCH_SIZE: int = 5
+    TEMPLATES_PER_EXPORT: int = 1
+    IMPORT_WORKERS: int = 5
+    TEMPLATES_PER_IMPORT: int = 1
+    IMAGE_PAGE_SIZE: int = 10
+    IMAGE_BATCH_BYTES: int = 8388608
+    IMAGE_INCREMENTAL_EXPORT: bool = False
+    INCREMENTAL_PUSH: bool = False
+    FULL_PUSH_INTERVAL: int = 86400
     IGNORE_TEMPLATE_VERSION: bool = False
     INSECURE_SSL_VERIFY: bool = False
     GIT_USERNAME: str = "git"
@@ -50,6 +58,24 @@ class Settings:
     REGEX_MATCHING: bool = False
     ICON_MAP_WHITELIST: str = ""
     ICON_MAP_BLACKLIST: str = ""
+    ZABBIX_MAX_ATTEMPTS: int = 3
+    ZABBIX_RETRY_DELAY: int = 500
+    ZABBIX_RETRY_MAX_DELAY: int = 30000
+    ZABBIX_CIRCUIT_BREAKER_THRESHOLD: int = 10
+    ZABBIX_CIRCUIT_BREAKER_TIMEOUT: int = 30
+    ZABBIX_METHOD_TIMEOUTS: dict = {}
+    ZABBIX_CONNECTION_LIMIT: int = 0
+    ZABBIX_KEEPALIVE_TIMEOUT: int = 30
+    ZABBIX_DNS_CACHE_TTL: int = 300
+    ZABBIX_CONNECT_TIMEOUT: int = 10
+    ZABBIX_READ_RATE_LIMIT: int = 0
+    ZABBIX_READ_CONCURRENCY: int = 0
+    ZABBIX_WRITE_RATE_LIMIT: int = 0
+    ZABBIX_WRITE_CONCURRENCY: int = 0
+    ZABBIX_CASSETTE: str | None = None
+    ZABBIX_CASSETTE_MODE: str = "record"
+    ZABBIX_CASSETTE_TIME_SCALE: int = 100
+    YAML_BACKEND: str = "auto"
     ZABBIX_KWARGS: dict = {}
     GIT_KWARGS: dict = {}
     SKIP_VERSION_CHECK: bool = False
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from zabbix_utils import ProcessingError  # type: ignore
+
+if TYPE_CHECKING:
+    from zabbixci.zabbix.zabbix import Zabbix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_REQUEST_SIZE = 50
+
+
+class ZabbixBatch:
+    """
+    Queue of Zabbix API calls that are sent as JSON-RPC batch requests.
+    Responses and per-call errors are returned to the caller of each call.
+
+    :param zabbix: Zabbix instance
+    :param max_size: Maximum amount of calls in a single HTTP request
+    :param max_bytes: Maximum size of the calls in a single HTTP request in bytes,
+        0 for no limit. A single call larger than the limit is sent on its own.
+    :param split_on_failure: Send the calls of a batch request separately when
+        the request fails as a whole, so only the failing calls fail
+    """
+
+    _zabbix: "Zabbix"
+    _calls: list[tuple[dict, dict, asyncio.Future]]
+
+    def __init__(
+        self,
+        zabbix: "Zabbix",
+        max_size: int = DEFAULT_BATCH_REQUEST_SIZE,
+        max_bytes: int = 0,
+        split_on_failure: bool = False,
+    ):
+        self._zabbix = zabbix
+        self._max_size = max(int(max_size), 1)
+        self._max_bytes = max(int(max_bytes), 0)
+        self._split_on_failure = split_on_failure
+        self._calls = []
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.send()
+
+    def add(self, method: str, params=None, need_auth: bool = True) -> asyncio.Future:
+        """
+        Queue an API call
+
+        :param method: Zabbix API method
+        :param params: Parameters for the method
+        :param need_auth: Whether the method requires authentication
+
+        :return: Future that resolves to the result of the call after sending
+        """
+        request, headers = self._zabbix._prepare_request(method, params, need_auth)
+        future = asyncio.get_running_loop().create_future()
+
+        self._calls.append((request, headers, future))
+        return future
+
+    async def _send_chunk(self, calls: list[tuple[dict, dict, asyncio.Future]]):
+        try:
+            responses = await self._zabbix._post(
+                [request for request, _, _ in calls], calls[0][1]
+            )
+        except Exception as e:
+            await self._chunk_failed(calls, e)
+            return
+        finally:
+            for request, _, _ in calls:
+                self._zabbix._invalidate_after(request["method"])
+
+        if not isinstance(responses, list):
+            # Zabbix answers with a single error object when the batch is rejected
+            await self._chunk_failed(
+                calls, ProcessingError("Invalid batch response:", responses)
+            )
+            return
+
+        responses_by_id = {response.get("id"): response for response in responses}
+
+        for request, _, future in calls:
+            response = responses_by_id.get(request["id"])
+
+            if response is None:
+                future.set_exception(
+                    ProcessingError(f"No response for {request['method']} in batch")
+                )
+                continue
+
+            try:
+                future.set_result(self._zabbix._check_response(response))
+            except Exception as e:
+                future.set_exception(e)
+
+    async def _chunk_failed(
+        self, calls: list[tuple[dict, dict, asyncio.Future]], error: Exception
+    ) -> None:
+        """
+        Fail the calls of a batch request that failed as a whole, or send them
+        separately with split_on_failure
+        """
+        if not self._split_on_failure or len(calls) == 1:
+            for _, _, future in calls:
+                future.set_exception(error)
+            return
+
+        logger.warning(
+            "Batch of %d Zabbix API calls failed, sending them separately", len(calls)
+        )
+        logger.debug("Error details: %s", error)
+
+        for call in calls:
+            await self._send_chunk([call])
+
+    def _chunks(self, calls: list[tuple[dict, dict, asyncio.Future]]):
+        """
+        Divide calls into batch requests of at most max_size calls and max_bytes
+        """
+        chunk: list[tuple[dict, dict, asyncio.Future]] = []
+        chunk_bytes = 0
+
+        for call in calls:
+            call_bytes = len(json.dumps(call[0])) if self._max_bytes else 0
+
+            if chunk and (
+                len(chunk) >= self._max_size
+                or (self._max_bytes and chunk_bytes + call_bytes > self._max_bytes)
+            ):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+
+            chunk.append(call)
+            chunk_bytes += call_bytes
+
+        if chunk:
+            yield chunk
+
+    async def send(self) -> list:
+        """
+        Send all queued calls, split into requests of at most max_size calls
+        and max_bytes
+
+        :return: Results in order of queueing, failed calls are returned as exceptions
+        """
+        calls, self._calls = self._calls, []
+
+        for chunk in self._chunks(calls):
+            logger.debug("Sending batch of %d Zabbix API calls", len(chunk))
+            await self._send_chunk(chunk)
+
+        return await asyncio.gather(
+            *[future for _, _, future in calls], return_exceptions=True
+        )
@@ -0,0 +1,239 @@
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import deque
+
+from zabbix_utils import APIRequestError, AsyncZabbixAPI, ProcessingError  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ["record", "replay"]
+
+# Authentication requests carry passwords, API tokens and session IDs. They are
+# matched on their method only and their parameters and results are not recorded.
+REDACTED_METHODS = ["user.login", "user.checkAuthentication", "user.logout"]
+REDACTED = "redacted"
+
+
+class Cassette:
+    """
+    Records Zabbix API requests and responses to a gzip compressed file of JSON lines,
+    or replays a recording without contacting Zabbix.
+
+    Requests are matched on their methods and parameters. Identical requests are
+    answered in recorded order, the last response is repeated when they run out.
+    Credentials and sessions of authentication requests are never recorded.
+
+    :param path: Path of the cassette file
+    :param mode: "record" or "replay"
+    :param time_scale: Factor applied to the recorded request durations during replay,
+        0 replays without delay
+    """
+
+    def __init__(self, path: str, mode: str = "record", time_scale: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Cassette mode must be one of {CASSETTE_MODES}")
+
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self._interactions: dict[str, deque] = {}
+        self._last: dict[str, dict] = {}
+
+        if mode == "record":
+            # Start with an empty cassette, interactions are appended as they happen
+            with gzip.open(path, "wt", encoding="utf-8"):
+                pass
+        else:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def _calls(payload: dict | list) -> list[dict]:
+        return payload if isinstance(payload, list) else [payload]
+
+    @classmethod
+    def _key(cls, payload: dict | list) -> str:
+        """
+        Match key of a request, independent of request IDs and authentication
+        """
+        return json.dumps(
+            [
+                [call["method"]]
+                if call["method"] in REDACTED_METHODS
+                else [call["method"], call.get("params") or {}]
+                for call in cls._calls(payload)
+            ],
+            sort_keys=True,
+        )
+
+    @staticmethod
+    def _redact_result(method: str, result):
+        if method == "user.login":
+            return REDACTED
+
+        if method == "user.checkAuthentication" and isinstance(result, dict):
+            # zabbix_utils only checks the user ID of the session
+            return {"userid": result.get("userid")}
+
+        return result
+
+    @classmethod
+    def _redact(cls, payload: dict | list, response):
+        """
+        Response without the results of authentication requests
+        """
+
+        def redact(method: str, item: dict) -> dict:
+            if method not in REDACTED_METHODS or "result" not in item:
+                return item
+
+            return {**item, "result": cls._redact_result(method, item["result"])}
+
+        if isinstance(payload, list) and isinstance(response, list):
+            methods = {call.get("id"): call["method"] for call in payload}
+            return [
+                redact(methods.get(item.get("id"), ""), item)
+                if isinstance(item, dict)
+                else item
+                for item in response
+            ]
+
+        if isinstance(payload, dict) and isinstance(response, dict):
+            return redact(payload["method"], response)
+
+        return response
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            for line in file:
+                interaction = json.loads(line)
+                self._interactions.setdefault(interaction["key"], deque()).append(
+                    interaction
+                )
+
+        logger.info(
+            "Loaded %d recorded Zabbix API requests from %s",
+            sum(len(queue) for queue in self._interactions.values()),
+            self.path,
+        )
+
+    def record(self, payload: dict | list, response, duration: float) -> None:
+        """
+        Append a request and its response to the cassette
+        """
+        interaction = {
+            "key": self._key(payload),
+            "ids": [call.get("id") for call in self._calls(payload)],
+            "response": self._redact(payload, response),
+            "duration": duration,
+        }
+
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            file.write(json.dumps(interaction) + "\n")
+
+    def _next(self, payload: dict | list):
+        key = self._key(payload)
+        queue = self._interactions.get(key)
+
+        if queue:
+            self._last[key] = queue.popleft()
+        elif key not in self._last:
+            raise ProcessingError(
+                "No recorded response for Zabbix API request:",
+                ", ".join(call["method"] for call in self._calls(payload)),
+            )
+
+        interaction = self._last[key]
+
+        # Responses refer to the request IDs of the recording
+        ids = dict(
+            zip(
+                interaction["ids"],
+                [call.get("id") for call in self._calls(payload)],
+                strict=True,
+            )
+        )
+
+        response = interaction["response"]
+
+        if isinstance(response, list):
+            response = [{**item, "id": ids.get(item.get("id"))} for item in response]
+        elif isinstance(response, dict) and "id" in response:
+            response = {**response, "id": ids.get(response["id"])}
+
+        return response, interaction["duration"] * self.time_scale
+
+    async def replay(self, payload: dict | list):
+        """
+        Get the recorded response of a request, after the scaled recorded duration
+        """
+        response, delay = self._next(payload)
+
+        if delay:
+            await asyncio.sleep(delay)
+
+        return response
+
+    def replay_sync(self, payload: dict | list):
+        response, delay = self._next(payload)
+
+        if delay:
+            time.sleep(delay)
+
+        return response
+
+
+class CassetteZabbixAPI(AsyncZabbixAPI):
+    """
+    AsyncZabbixAPI that records or replays the requests zabbix_utils sends itself,
+    such as the version check and login
+    """
+
+    def __init__(self, *args, cassette: Cassette, **kwargs):
+        self._cassette = cassette
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _payload(method: str, params) -> dict:
+        return {"jsonrpc": "2.0", "method": method, "params": params or {}}
+
+    @staticmethod
+    def _check(response: dict) -> dict:
+        if "error" in response:
+            error = response["error"].copy()
+            error["body"] = response.copy()
+            raise APIRequestError(error)
+
+        return response
+
+    def send_sync_request(self, method: str, params=None, need_auth=True) -> dict:
+        if self._cassette.replaying:
+            return self._check(
+                self._cassette.replay_sync(self._payload(method, params))
+            )
+
+        start = time.perf_counter()
+        response = super().send_sync_request(method, params, need_auth)
+        self._cassette.record(
+            self._payload(method, params), response, time.perf_counter() - start
+        )
+        return response
+
+    async def send_async_request(self, method: str, params=None, need_auth=True):
+        if self._cassette.replaying:
+            return self._check(
+                await self._cassette.replay(self._payload(method, params))
+            )
+
+        start = time.perf_counter()
+        response = await super().send_async_request(method, params, need_auth)
+        self._cassette.record(
+            self._payload(method, params), response, time.perf_counter() - start
+        )
+        return response
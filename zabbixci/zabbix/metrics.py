@@ -0,0 +1,118 @@
+import math
+
+
+class MethodMetrics:
+    """
+    Statistics of the HTTP requests made for a single Zabbix API method
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latencies: list[float] = []
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.latencies)
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Latency percentile in seconds, using the nearest-rank method
+        """
+        if not self.latencies:
+            return 0.0
+
+        latencies = sorted(self.latencies)
+        rank = max(math.ceil(percentile / 100 * len(latencies)), 1)
+        return latencies[rank - 1]
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_time": self.total_time,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": max(self.latencies, default=0.0),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+
+class ApiMetrics:
+    """
+    Per-method instrumentation of Zabbix API requests. Batch requests are
+    recorded under the combined name of the methods they contain.
+    """
+
+    def __init__(self):
+        self._methods: dict[str, MethodMetrics] = {}
+
+    def record(
+        self,
+        method: str,
+        latency: float,
+        request_bytes: int = 0,
+        response_bytes: int = 0,
+        errors: int = 0,
+    ) -> None:
+        """
+        Record a single HTTP request
+
+        :param method: Zabbix API method, or combined methods of a batch
+        :param latency: Request duration in seconds
+        :param request_bytes: Size of the request body
+        :param response_bytes: Size of the response body
+        :param errors: Amount of failed calls, transport failures count as one
+        """
+        metrics = self._methods.setdefault(method, MethodMetrics())
+        metrics.calls += 1
+        metrics.errors += errors
+        metrics.request_bytes += request_bytes
+        metrics.response_bytes += response_bytes
+        metrics.latencies.append(latency)
+
+    def reset(self) -> None:
+        self._methods.clear()
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Metrics per method, sorted by total time spent
+
+        :return: Dict of method names and their statistics
+        """
+        return {
+            method: metrics.as_dict()
+            for method, metrics in sorted(
+                self._methods.items(), key=lambda item: -item[1].total_time
+            )
+        }
+
+    def table(self) -> list[str]:
+        """
+        Format the summary as table rows, latencies are in milliseconds
+        """
+        summary = self.summary()
+
+        if not summary:
+            return []
+
+        width = max(len("Method"), *[len(method) for method in summary])
+
+        rows = [
+            f"{'Method':<{width}} {'Calls':>6} {'Errors':>6} {'Total':>9} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8} {'Sent':>10} {'Received':>10}"
+        ]
+
+        for method, stats in summary.items():
+            rows.append(
+                f"{method:<{width}} {stats['calls']:>6} {stats['errors']:>6} "
+                f"{stats['total_time'] * 1000:>9.0f} {stats['p50'] * 1000:>8.0f} "
+                f"{stats['p95'] * 1000:>8.0f} {stats['p99'] * 1000:>8.0f} "
+                f"{stats['request_bytes']:>10} {stats['response_bytes']:>10}"
+            )
+
+        return rows
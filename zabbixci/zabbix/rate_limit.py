@@ -0,0 +1,74 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+# Methods that do not change Zabbix, other methods use the write budget
+READ_METHODS = ["configuration.export", "apiinfo.version"]
+
+
+def is_read_method(method: str) -> bool:
+    return method.endswith(".get") or method in READ_METHODS
+
+
+class TokenBucket:
+    """
+    Token bucket allowing a sustained rate of requests with short bursts
+
+    :param rate: Requests per second, 0 disables the limit
+    :param burst: Maximum amount of requests sent at once, defaults to the rate
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.burst = max(burst or int(rate), 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """
+        Wait until a request is allowed
+        """
+        if not self.rate:
+            return
+
+        # Waiters are served in order, the lock is held while waiting for a token
+        async with self._lock:
+            self._refill()
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+
+            self._tokens -= 1
+
+
+class RateLimiter:
+    """
+    Limit the rate and concurrency of Zabbix API requests
+
+    :param rate: Requests per second, 0 disables the limit
+    :param concurrency: Maximum amount of in-flight requests, 0 disables the limit
+    """
+
+    def __init__(self, rate: float = 0, concurrency: int = 0):
+        self._bucket = TokenBucket(rate)
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    @asynccontextmanager
+    async def limit(self):
+        if self._semaphore is None:
+            await self._bucket.acquire()
+            yield
+            return
+
+        async with self._semaphore:
+            await self._bucket.acquire()
+            yield
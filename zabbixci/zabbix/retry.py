@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable
+
+import aiohttp
+from zabbix_utils import ProcessingError  # type: ignore
+
+from zabbixci.exceptions import ZabbixCircuitOpenError
+from zabbixci.zabbix.rate_limit import is_read_method
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes that indicate an overloaded or temporarily unavailable frontend
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Writes that give the same result when they are sent twice, other writes (such as
+# create and delete) are only retried when the request never reached Zabbix
+IDEMPOTENT_METHODS = ["configuration.import"]
+
+
+def is_idempotent_method(method: str) -> bool:
+    return (
+        is_read_method(method)
+        or method.endswith(".update")
+        or method in IDEMPOTENT_METHODS
+    )
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to the Zabbix API after a number of consecutive failures.
+    After the reset timeout a single trial request is let through, the circuit closes
+    again when it succeeds.
+
+    :param failure_threshold: Consecutive failures before the circuit opens, 0 disables
+    :param reset_timeout: Seconds to wait before a trial request is allowed
+    """
+
+    _failures: int = 0
+    _opened_at: float | None = None
+
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """
+        Raise ZabbixCircuitOpenError when requests are not allowed
+        """
+        if self._opened_at is None:
+            return
+
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            raise ZabbixCircuitOpenError(
+                f"Zabbix API circuit is open after {self._failures} consecutive failures"
+            )
+
+        # Allow a single trial request, other requests wait for a new timeout
+        self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Zabbix API is responding again, closing circuit")
+
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+
+        if (
+            self.failure_threshold
+            and self._failures >= self.failure_threshold
+            and self._opened_at is None
+        ):
+            logger.warning(
+                "Zabbix API failed %d times in a row, pausing requests for %s seconds",
+                self._failures,
+                self.reset_timeout,
+            )
+            self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Bounded retries with exponential backoff and full jitter for transient failures
+
+    :param max_attempts: Maximum amount of attempts per request, including the first
+    :param backoff: Base delay in seconds, doubled for every attempt
+    :param max_backoff: Upper bound of the delay in seconds
+    """
+
+    def __init__(
+        self, max_attempts: int = 3, backoff: float = 0.5, max_backoff: float = 30
+    ):
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt: int) -> float:
+        """
+        Delay before the next attempt, after the given (1-based) failed attempt
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        )
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """
+        Transient errors are retried, Zabbix API errors (invalid requests) are not
+        """
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRYABLE_STATUS_CODES
+
+        return isinstance(
+            error, (aiohttp.ClientError, asyncio.TimeoutError, ProcessingError)
+        )
+
+    @staticmethod
+    def is_unsent(error: BaseException) -> bool:
+        """
+        Connection failures that happen before the request is sent to Zabbix
+        """
+        return isinstance(
+            error, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+        )
+
+    async def run(
+        self,
+        request: Callable[[], Awaitable],
+        circuit_breaker: CircuitBreaker | None = None,
+        description: str = "request",
+        idempotent: bool = True,
+    ):
+        """
+        Run a request, retrying transient failures
+
+        :param request: Callable returning a new request coroutine for every attempt
+        :param circuit_breaker: Circuit breaker that is checked and updated per attempt
+        :param description: Description of the request for logging
+        :param idempotent: Whether the request may be repeated after it was sent,
+            otherwise only connection failures are retried
+        """
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            if circuit_breaker:
+                circuit_breaker.check()
+
+            try:
+                result = await request()
+            except Exception as e:
+                if not self.is_retryable(e):
+                    raise
+
+                if circuit_breaker:
+                    circuit_breaker.record_failure()
+
+                if attempt >= self.max_attempts:
+                    raise
+
+                if not idempotent and not self.is_unsent(e):
+                    logger.warning(
+                        "Not retrying %s, Zabbix may have processed it: %s",
+                        description,
+                        e,
+                    )
+                    raise
+
+                delay = self.delay(attempt)
+                logger.debug(
+                    "Attempt %d/%d of %s failed (%s), retrying in %.2f seconds",
+                    attempt,
+                    self.max_attempts,
+                    description,
+                    e,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            if circuit_breaker:
+                circuit_breaker.record_success()
+
+            return result
@@ -1,37 +1,383 @@
+import asyncio
+import json
+import logging
+import time
 from ssl import SSLContext
+from typing import Awaitable
 
 import aiohttp
 from ruamel.yaml import YAML
-from zabbix_utils import AsyncZabbixAPI  # type: ignore
+from zabbix_utils import (  # type: ignore
+    APINotSupported,
+    APIRequestError,
+    AsyncZabbixAPI,
+    ProcessingError,
+)
 
 from zabbixci.assets import Template
-
+from zabbixci.exceptions import ZabbixError
+from zabbixci.zabbix.cassette import Cassette, CassetteZabbixAPI
+from zabbixci.zabbix.batch import DEFAULT_BATCH_REQUEST_SIZE, ZabbixBatch
+from zabbixci.zabbix.metrics import ApiMetrics
+from zabbixci.zabbix.rate_limit import RateLimiter, is_read_method
+from zabbixci.zabbix.retry import CircuitBreaker, RetryPolicy, is_idempotent_method
+
+logger = logging.getLogger(__name__)
 yaml = YAML()
 
+# Private request preparation of zabbix_utils, see Zabbix._prepare_request
+PREPARE_REQUEST_ATTRIBUTE = "_AsyncZabbixAPI__prepare_request"
+
+# Seconds subtracted from the time of the last export when reading the audit log,
+# covers clock differences between ZabbixCI and the Zabbix server
+AUDIT_CLOCK_MARGIN = 300
+
+# Audit log resource type of images
+AUDIT_RESOURCE_IMAGE = 16
+
+# Audit log resource types of template groups, Zabbix 6.0 stores templates in
+# host groups. Group changes, such as renames, affect the exports of all templates.
+AUDIT_RESOURCE_TEMPLATE_GROUP = 50
+AUDIT_RESOURCE_HOST_GROUP = 14
+
+# Audit log resource types of templates and their objects. Objects are traced back
+# to their template with the API method, ID parameter and template field.
+AUDIT_TEMPLATE_RESOURCES: dict[int, tuple[str, str, str] | None] = {
+    30: None,  # Template
+    6: ("graph.get", "graphids", "hosts"),
+    13: ("trigger.get", "triggerids", "hosts"),
+    15: ("item.get", "itemids", "hostid"),
+    17: ("valuemap.get", "valuemapids", "hostid"),
+    22: ("httptest.get", "httptestids", "hostid"),
+    23: ("discoveryrule.get", "itemids", "hostid"),
+    29: ("usermacro.get", "hostmacroids", "hostid"),
+    31: ("triggerprototype.get", "triggerids", "hosts"),
+    35: ("graphprototype.get", "graphids", "hosts"),
+    36: ("itemprototype.get", "itemids", "hostid"),
+    37: ("hostprototype.get", "hostids", "discoveryRule"),
+    43: ("templatedashboard.get", "dashboardids", "templateid"),
+}
+
+# Cached metadata categories that are outdated after calling these methods
+METADATA_INVALIDATION = {
+    # Imports can create template groups
+    "configuration.import": ("template_groups",),
+    "image.create": ("images",),
+    "image.update": ("images",),
+    "image.delete": ("images",),
+}
+
 
 class Zabbix:
     zapi: AsyncZabbixAPI
     _client_session = None
+    _metadata: dict
+    _retry_policy: RetryPolicy
+    _circuit_breaker: CircuitBreaker | None
+    _method_timeouts: dict[str, float]
+    _connect_timeout: float | None
+    _read_limiter: RateLimiter
+    _write_limiter: RateLimiter
+    metrics: ApiMetrics
+    _cassette: Cassette | None
 
     @property
     def api_version(self):
         return self.zapi.version
 
     def __init__(self, *args, **kwargs):
-        if "ssl_context" in kwargs:
-            if kwargs["ssl_context"]:
-                if not isinstance(kwargs["ssl_context"], SSLContext):
-                    raise ValueError("ssl_context must be an instance of SSLContext")
+        if not hasattr(AsyncZabbixAPI, PREPARE_REQUEST_ATTRIBUTE):
+            raise ZabbixError(
+                "Installed zabbix_utils version is not supported, "
+                f"AsyncZabbixAPI.{PREPARE_REQUEST_ATTRIBUTE} is missing. "
+                "Install zabbix_utils>=2.0.3,<2.1"
+            )
+
+        ssl_context = kwargs.pop("ssl_context", None)
+        self._retry_policy = kwargs.pop("retry_policy", None) or RetryPolicy()
+        self._circuit_breaker = kwargs.pop("circuit_breaker", None)
+        self._method_timeouts = kwargs.pop("method_timeouts", None) or {}
+        self._connect_timeout = kwargs.pop("connect_timeout", None)
+        self._read_limiter = kwargs.pop("read_limiter", None) or RateLimiter()
+        self._write_limiter = kwargs.pop("write_limiter", None) or RateLimiter()
+        self._cassette = kwargs.pop("cassette", None)
+
+        # zabbix_utils rejects HTTP authentication together with a client session,
+        # the credentials are set on our session instead
+        http_user = kwargs.pop("http_user", None)
+        http_password = kwargs.pop("http_password", None)
+
+        connection_limit = kwargs.pop("connection_limit", 100)
+        keepalive_timeout = kwargs.pop("keepalive_timeout", 15)
+        dns_cache_ttl = kwargs.pop("dns_cache_ttl", 10)
+
+        if ssl_context and not isinstance(ssl_context, SSLContext):
+            raise ValueError("ssl_context must be an instance of SSLContext")
+
+        # Always provide our own session, zabbix_utils closes its internal session
+        # on any API error, which would break requests that are still in flight.
+        # All requests share a single pool of keep-alive connections.
+        self._client_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                ssl=ssl_context or kwargs.get("validate_certs", True),
+                limit=connection_limit,
+                keepalive_timeout=keepalive_timeout,
+                use_dns_cache=dns_cache_ttl != 0,
+                ttl_dns_cache=dns_cache_ttl or None,
+            ),
+            auth=(
+                aiohttp.BasicAuth(http_user, http_password)
+                if http_user and http_password
+                else None
+            ),
+        )
+
+        try:
+            if self._cassette:
+                self.zapi = CassetteZabbixAPI(
+                    *args,
+                    **kwargs,
+                    client_session=self._client_session,
+                    cassette=self._cassette,
+                )
+            else:
+                self.zapi = AsyncZabbixAPI(
+                    *args, **kwargs, client_session=self._client_session
+                )
+
+            if http_user and http_password and self.zapi.version > 7.0:
+                raise APINotSupported(
+                    "HTTP authentication unsupported since Zabbix 7.2."
+                )
+        except Exception:
+            # zabbix_utils does not close sessions it did not create, the session
+            # is closed on the event loop it was created on
+            asyncio.ensure_future(self._client_session.close())
+            raise
+
+        self._metadata = {}
+        self.metrics = ApiMetrics()
+
+    async def _memoize(self, key: tuple, coro_factory):
+        """
+        Run-scoped cache for Zabbix metadata lookups, such as the server version
+        and template groups. Lookups are shared until they are invalidated.
+
+        :param key: Cache key, the first item is used as category for invalidation
+        :param coro_factory: Callable returning the coroutine that performs the lookup
+        """
+        if key not in self._metadata:
+            # Store the task, so concurrent lookups share a single request
+            self._metadata[key] = asyncio.ensure_future(coro_factory())
+
+        try:
+            return await self._metadata[key]
+        except Exception:
+            # Do not cache failed lookups
+            self._metadata.pop(key, None)
+            raise
+
+    def invalidate_metadata(self, *categories: str) -> None:
+        """
+        Invalidate cached metadata, when no categories are given the cache is cleared
+
+        :param categories: Metadata categories to invalidate, e.g. "images"
+        """
+        if not categories:
+            self._metadata.clear()
+            return
+
+        for key in [key for key in self._metadata if key[0] in categories]:
+            del self._metadata[key]
+
+    def _invalidate_after(self, method: str) -> None:
+        """
+        Invalidate metadata that is affected by a (possibly failed) mutation
+        """
+        if method in METADATA_INVALIDATION:
+            self.invalidate_metadata(*METADATA_INVALIDATION[method])
+
+    def _prepare_request(
+        self, method: str, params=None, need_auth: bool = True
+    ) -> tuple[dict, dict]:
+        """
+        Build a JSON-RPC request and headers for the Zabbix API
+
+        zabbix_utils does not expose its request preparation, which takes care of
+        the authentication method that matches the Zabbix version
+        """
+        return getattr(self.zapi, PREPARE_REQUEST_ATTRIBUTE)(method, params, need_auth)
+
+    def _timeout(self, methods: list[str]) -> float:
+        """
+        Request timeout in seconds, the longest timeout of the included methods
+        """
+        return max(
+            float(self._method_timeouts.get(method, self.zapi.timeout))
+            for method in methods
+        )
+
+    async def _post(self, payload: dict | list, headers: dict):
+        """
+        Post a single or batched JSON-RPC payload to the Zabbix API.
+        Transient failures are retried according to the retry policy, batches with
+        non-idempotent writes only when the request was not sent.
+
+        :return: Decoded JSON response
+        """
+        methods = (
+            [request["method"] for request in payload]
+            if isinstance(payload, list)
+            else [payload["method"]]
+        )
+
+        # Batches containing any write use the write budget
+        limiter = (
+            self._read_limiter
+            if all(is_read_method(method) for method in methods)
+            else self._write_limiter
+        )
+
+        description = ", ".join(sorted(set(methods)))
+        data = json.dumps(payload).encode()
+
+        start = time.perf_counter()
+
+        if self._cassette and self._cassette.replaying:
+            result = await self._cassette.replay(payload)
+            self.metrics.record(
+                description,
+                time.perf_counter() - start,
+                len(data),
+                len(json.dumps(result)),
+            )
+            return result
+
+        result = await self._retry_policy.run(
+            lambda: self._post_once(
+                data, headers, self._timeout(methods), limiter, description
+            ),
+            self._circuit_breaker,
+            description,
+            idempotent=all(is_idempotent_method(method) for method in methods),
+        )
+
+        if self._cassette:
+            self._cassette.record(payload, result, time.perf_counter() - start)
+
+        return result
 
-                self._client_session = aiohttp.ClientSession(
-                    connector=aiohttp.TCPConnector(ssl=kwargs["ssl_context"])
+    async def _post_once(
+        self,
+        data: bytes,
+        headers: dict,
+        timeout: float,
+        limiter: RateLimiter,
+        description: str,
+    ):
+        async with limiter.limit():
+            start = time.perf_counter()
+            body = b""
+
+            try:
+                response = await self._client_session.post(
+                    self.zapi.url,
+                    data=data,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(
+                        total=timeout, sock_connect=self._connect_timeout
+                    ),
                 )
+                response.raise_for_status()
+                body = await response.read()
+
+                try:
+                    result = json.loads(body)
+                except ValueError as e:
+                    raise ProcessingError("Unable to parse json:", e) from None
+            except Exception:
+                self.metrics.record(
+                    description,
+                    time.perf_counter() - start,
+                    len(data),
+                    len(body),
+                    errors=1,
+                )
+                raise
+
+            self.metrics.record(
+                description,
+                time.perf_counter() - start,
+                len(data),
+                len(body),
+                errors=sum(
+                    1
+                    for item in (result if isinstance(result, list) else [result])
+                    if isinstance(item, dict) and "error" in item
+                ),
+            )
+
+            return result
+
+    @staticmethod
+    def _check_response(response: dict):
+        """
+        Raise an APIRequestError when the Zabbix API response contains an error
 
-            del kwargs["ssl_context"]
+        :return: Result of the API call
+        """
+        if "error" in response:
+            error = response["error"].copy()
+            error["body"] = response.copy()
+            raise APIRequestError(error)
+
+        return response["result"]
+
+    async def _request(self, method: str, params=None, need_auth: bool = True):
+        """
+        Send a request to the Zabbix API without blocking the event loop
 
-        self.zapi = AsyncZabbixAPI(*args, **kwargs, client_session=self._client_session)
+        :param method: Zabbix API method
+        :param params: Parameters for the method
+        :param need_auth: Whether the method requires authentication
 
-    def _get_template_group(self, template_group_names: list[str]):
+        :return: Result of the API call
+        """
+        request, headers = self._prepare_request(method, params, need_auth)
+
+        try:
+            return self._check_response(await self._post(request, headers))
+        finally:
+            self._invalidate_after(method)
+
+    def _call(
+        self, method: str, params=None, batch: ZabbixBatch | None = None
+    ) -> Awaitable:
+        """
+        Send an API call directly, or queue it when a batch is provided.
+        Queued calls resolve after the batch has been sent.
+        """
+        if batch is not None:
+            return batch.add(method, params)
+
+        return self._request(method, params)
+
+    def batch(
+        self,
+        max_size: int = DEFAULT_BATCH_REQUEST_SIZE,
+        max_bytes: int = 0,
+        split_on_failure: bool = False,
+    ) -> ZabbixBatch:
+        """
+        Create a batch that sends queued API calls as JSON-RPC batch requests
+
+        :param max_size: Maximum amount of calls in a single HTTP request
+        :param max_bytes: Maximum size of a single HTTP request in bytes, 0 for no limit
+        :param split_on_failure: Send the calls separately when a batch request fails
+        """
+        return ZabbixBatch(self, max_size, max_bytes, split_on_failure)
+
+    async def _get_template_group(self, template_group_names: list[str]):
         names = template_group_names + [f"{name}/*" for name in template_group_names]
 
         params = {
@@ -40,46 +386,56 @@ class Zabbix:
             "searchWildcardsEnabled": True,
         }
 
-        if self.api_version < 6.2:
-            return self.zapi.send_sync_request("hostgroup.get", params)["result"]
-        else:
-            return self.zapi.send_sync_request(
-                "templategroup.get",
-                params,
-            )["result"]
+        method = "hostgroup.get" if self.api_version < 6.2 else "templategroup.get"
 
-    def get_templates(
+        return await self._memoize(
+            ("template_groups", *template_group_names),
+            lambda: self._request(method, params),
+        )
+
+    async def get_templates(
         self, template_group_names: list[str], filter_list: list[str] | None = None
     ):
-        ids = self._get_template_group(template_group_names)
+        ids = await self._get_template_group(template_group_names)
 
         template_group_ids = [group["groupid"] for group in ids]
 
         if filter_list:
-            return self.zapi.send_sync_request(
+            return await self._request(
                 "template.get",
                 {"groupids": template_group_ids, "filter": {"host": filter_list}},
-            )["result"]
+            )
         else:
-            return self.zapi.send_sync_request(
-                "template.get", {"groupids": template_group_ids}
-            )["result"]
+            return await self._request("template.get", {"groupids": template_group_ids})
 
-    def set_template(self, template_id: int, changes: dict):
-        return self.zapi.send_sync_request(
-            "template.update", {"templateid": template_id, **changes}
-        )["result"]
+    def set_template(
+        self, template_id: int, changes: dict, batch: ZabbixBatch | None = None
+    ) -> Awaitable:
+        return self._call(
+            "template.update", {"templateid": template_id, **changes}, batch
+        )
 
-    def export_template_async(self, template_ids: list[int]):
-        return self.zapi.send_async_request(
+    async def set_templates(self, updates: list[dict]):
+        """
+        Update multiple templates in a single template.update call
+
+        :param updates: Template objects, each including its templateid
+        """
+        return await self._request("template.update", updates)
+
+    def export_template_async(
+        self, template_ids: list[int], batch: ZabbixBatch | None = None
+    ) -> Awaitable:
+        return self._call(
             "configuration.export",
             {"options": {"templates": template_ids}, "format": "yaml"},
+            batch,
         )
 
-    def import_template(self, template: Template):
+    async def import_template(self, template: Template):
         export = template.export()
 
-        return self.zapi.send_sync_request(
+        return await self._request(
             "configuration.import",
             {
                 "format": "yaml",
@@ -103,7 +459,10 @@ class Zabbix:
                             }
                         }
                     ),
-                    "templateLinkage": {"createMissing": True, "deleteMissing": True},
+                    "templateLinkage": {
+                        "createMissing": True,
+                        "deleteMissing": True,
+                    },
                     "templates": {
                         "createMissing": True,
                         "updateExisting": True,
@@ -146,67 +505,248 @@ class Zabbix:
                 },
                 "source": export,
             },
-        )["result"]
+        )
 
-    def get_templates_name(self, name: list[str]):
-        return self.zapi.send_sync_request("template.get", {"filter": {"host": name}})[
-            "result"
-        ]
+    async def get_templates_name(self, name: list[str]):
+        return await self._request("template.get", {"filter": {"host": name}})
 
-    def delete_templates(self, template_ids: list[int]):
-        return self.zapi.send_sync_request("template.delete", template_ids)["result"]
+    async def delete_templates(self, template_ids: list[int]):
+        return await self._request("template.delete", template_ids)
 
-    def get_images(self, search: list[str] | None = None):
+    async def get_images(self, search: list[str] | None = None):
         """
-        Export images from Zabbix
-
-        TODO: Add batching for large number of images
+        Export images from Zabbix, including the image data of all matching images.
+        Use get_image_ids and get_images_by_id to export images in pages.
         """
         if not search:
-            return self.zapi.send_sync_request(
+            return await self._request(
                 "image.get", {"output": "extend", "select_image": True}
-            )["result"]
+            )
         else:
-            return self.zapi.send_sync_request(
+            return await self._request(
                 "image.get",
                 {"output": "extend", "select_image": True, "filter": {"name": search}},
-            )["result"]
+            )
 
-    def create_image(self, image: dict):
-        return self.zapi.send_sync_request("image.create", image)["result"]
+    async def get_image_ids(self):
+        """
+        Get the ID, name and type of all images in Zabbix, without the image data.
+        The result is cached until images are created, updated or deleted.
+        """
+        return await self._memoize(
+            ("images",),
+            lambda: self._request(
+                "image.get", {"output": ["imageid", "name", "imagetype"]}
+            ),
+        )
 
-    def update_image(self, image: dict):
-        return self.zapi.send_sync_request("image.update", image)["result"]
+    async def get_images_by_id(self, image_ids: list[int]):
+        """
+        Export a page of images from Zabbix, including the image data
+        """
+        return await self._request(
+            "image.get",
+            {"output": "extend", "select_image": True, "imageids": image_ids},
+        )
 
-    def delete_images(self, image_ids: list[int]):
-        return self.zapi.send_sync_request("image.delete", image_ids)["result"]
+    async def get_audit(self, resource_types: list[int], time_from: int):
+        """
+        Get audit log entries of the resource types changed since the given
+        unix timestamp
+        """
+        return await self._request(
+            "auditlog.get",
+            {
+                "output": ["resourcetype", "resourceid", "userid", "clock"],
+                "filter": {"resourcetype": resource_types},
+                "time_from": time_from,
+            },
+        )
+
+    async def audit_log_enabled(self) -> bool:
+        """
+        Check if changes can be detected with the Zabbix audit log
+        """
+        try:
+            audit_settings = await self._request(
+                "settings.get", {"output": ["auditlog_enabled"]}
+            )
+        except (APIRequestError, ProcessingError) as e:
+            logger.warning("Unable to read the Zabbix audit log settings")
+            logger.debug("Error details: %s", e)
+            return False
+
+        if str(audit_settings.get("auditlog_enabled", "1")) != "1":
+            logger.warning("Zabbix audit log is disabled, unable to detect changes")
+            return False
+
+        return True
+
+    async def _read_audit(self, resource_types: list[int], since: int) -> list | None:
+        """
+        Read the audit log entries of the resource types since the unix timestamp
+        of the last export, allowing AUDIT_CLOCK_MARGIN for clock differences
 
-    def get_icon_maps(self, search: list[str] | None = None):
+        :return: Audit log entries, None when the audit log can not be used
+        """
+        if not await self.audit_log_enabled():
+            return None
+
+        try:
+            return await self.get_audit(resource_types, since - AUDIT_CLOCK_MARGIN)
+        except (APIRequestError, ProcessingError) as e:
+            logger.warning("Unable to read the Zabbix audit log")
+            logger.debug("Error details: %s", e)
+            return None
+
+    async def get_changed_image_ids(self, since: int) -> set[str] | None:
+        """
+        Get the IDs of images changed since the given unix timestamp
+
+        :return: Set of image IDs, None when the audit log can not be used
+        """
+        audit = await self._read_audit([AUDIT_RESOURCE_IMAGE], since)
+
+        if audit is None:
+            return None
+
+        return {str(entry["resourceid"]) for entry in audit}
+
+    async def get_changed_template_ids(self, since: int) -> set[str] | None:
+        """
+        Get the IDs of templates that were changed by users since the given
+        unix timestamp, based on the audit log of templates and their objects
+
+        :return: Set of template IDs, None when the audit log can not be used or
+            a change can not be traced back to a template, for example because
+            the object has been deleted or a template group has changed
+        """
+        group_resource = (
+            AUDIT_RESOURCE_HOST_GROUP
+            if self.api_version < 6.2
+            else AUDIT_RESOURCE_TEMPLATE_GROUP
+        )
+
+        audit = await self._read_audit(
+            [*AUDIT_TEMPLATE_RESOURCES, group_resource], since
+        )
+
+        if audit is None:
+            return None
+
+        template_ids: set[str] = set()
+        lookups: dict[int, set[str]] = {}
+
+        for entry in audit:
+            # Changes made by the server itself, such as discovery, are not relevant
+            if str(entry.get("userid", "")) == "0":
+                continue
+
+            resource_type = int(entry["resourcetype"])
+
+            if resource_type == group_resource:
+                logger.info("Template groups have changed in Zabbix")
+                return None
+
+            if AUDIT_TEMPLATE_RESOURCES.get(resource_type) is None:
+                template_ids.add(str(entry["resourceid"]))
+            else:
+                lookups.setdefault(resource_type, set()).add(str(entry["resourceid"]))
+
+        batch = self.batch()
+        requests = []
+
+        for resource_type, object_ids in lookups.items():
+            method, id_param, template_field = AUDIT_TEMPLATE_RESOURCES[resource_type]  # type: ignore
+            id_field = id_param[:-1]
+
+            params: dict = {id_param: list(object_ids)}
+
+            if template_field == "hosts":
+                params.update({"output": [id_field], "selectHosts": ["hostid"]})
+            elif template_field == "discoveryRule":
+                # Host prototypes belong to the template of their discovery rule
+                params.update({"output": [id_field], "selectDiscoveryRule": ["hostid"]})
+            else:
+                params["output"] = [id_field, template_field]
+
+            requests.append(
+                (object_ids, id_field, template_field, batch.add(method, params))
+            )
+
+        try:
+            if len(batch):
+                await batch.send()
+
+            for object_ids, id_field, template_field, request in requests:
+                found_ids = set()
+
+                for obj in await request:
+                    found_ids.add(str(obj[id_field]))
+
+                    if template_field == "hosts":
+                        template_ids.update(
+                            str(host["hostid"]) for host in obj["hosts"]
+                        )
+                    elif template_field == "discoveryRule":
+                        template_ids.add(str(obj["discoveryRule"]["hostid"]))
+                    else:
+                        template_ids.add(str(obj[template_field]))
+
+                if object_ids - found_ids:
+                    logger.info(
+                        "Changes in the audit log can not be traced back to templates"
+                    )
+                    return None
+        except (APIRequestError, ProcessingError) as e:
+            logger.warning("Unable to trace changes in the audit log to templates")
+            logger.debug("Error details: %s", e)
+            return None
+
+        return template_ids
+
+    def create_image(self, image: dict, batch: ZabbixBatch | None = None) -> Awaitable:
+        return self._call("image.create", image, batch)
+
+    def update_image(self, image: dict, batch: ZabbixBatch | None = None) -> Awaitable:
+        return self._call("image.update", image, batch)
+
+    async def delete_images(self, image_ids: list[int]):
+        return await self._request("image.delete", image_ids)
+
+    async def get_icon_maps(self, search: list[str] | None = None):
         """
         Export icon_maps from Zabbix
         """
         if not search:
-            return self.zapi.send_sync_request(
+            return await self._request(
                 "iconmap.get", {"output": "extend", "selectMappings": "extend"}
-            )["result"]
+            )
         else:
-            return self.zapi.send_sync_request(
+            return await self._request(
                 "iconmap.get",
                 {
                     "output": "extend",
                     "selectMappings": "extend",
                     "filter": {"name": search},
                 },
-            )["result"]
+            )
 
-    def update_icon_map(self, icon_map: dict):
-        return self.zapi.send_sync_request("iconmap.update", icon_map)["result"]
+    def update_icon_map(
+        self, icon_map: dict, batch: ZabbixBatch | None = None
+    ) -> Awaitable:
+        return self._call("iconmap.update", icon_map, batch)
 
-    def create_icon_map(self, icon_map: dict):
-        return self.zapi.send_sync_request("iconmap.create", icon_map)["result"]
+    def create_icon_map(
+        self, icon_map: dict, batch: ZabbixBatch | None = None
+    ) -> Awaitable:
+        return self._call("iconmap.create", icon_map, batch)
 
-    def delete_icon_maps(self, icon_map_ids: list[int]):
-        return self.zapi.send_sync_request("iconmap.delete", icon_map_ids)["result"]
+    async def delete_icon_maps(self, icon_map_ids: list[int]):
+        return await self._request("iconmap.delete", icon_map_ids)
 
-    def get_server_version(self):
-        return self.zapi.send_sync_request("apiinfo.version", need_auth=False)["result"]
+    async def get_server_version(self):
+        return await self._memoize(
+            ("server_version",),
+            lambda: self._request("apiinfo.version", need_auth=False),
+        )
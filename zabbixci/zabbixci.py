@@ -6,15 +6,21 @@ from datetime import datetime, timezone
 from pygit2.enums import FileStatus, ResetMode
 from regex import search
 from ruamel.yaml import YAML
+from zabbix_utils import APIRequestError, ProcessingError
 
 from zabbixci.assets import Template
+from zabbixci.cache.cache import Cache
 from zabbixci.cache.cleanup import Cleanup
+from zabbixci.cache.manifest import Manifest
 from zabbixci.git import Git, GitCredentials
 from zabbixci.handlers.synchronization.icon_map_synchronization import IconMapHandler
 from zabbixci.handlers.synchronization.image_synchronization import ImageHandler
 from zabbixci.handlers.synchronization.template_synchronization import TemplateHandler
 from zabbixci.settings import Settings
 from zabbixci.zabbix import Zabbix
+from zabbixci.zabbix.cassette import Cassette
+from zabbixci.zabbix.rate_limit import RateLimiter
+from zabbixci.zabbix.retry import CircuitBreaker, RetryPolicy
 
 
 class ZabbixCI:
@@ -42,11 +48,48 @@ class ZabbixCI:
             self._ssl_context = ssl.create_default_context()
             self._ssl_context.load_verify_locations(Settings.CA_BUNDLE)
 
+        cassette = (
+            Cassette(
+                self._settings.ZABBIX_CASSETTE,
+                self._settings.ZABBIX_CASSETTE_MODE,
+                int(self._settings.ZABBIX_CASSETTE_TIME_SCALE) / 100,
+            )
+            if self._settings.ZABBIX_CASSETTE
+            else None
+        )
+
         self._zabbix = Zabbix(
             url=self._settings.ZABBIX_URL,
             validate_certs=not self._settings.INSECURE_SSL_VERIFY,
             ssl_context=self._ssl_context,
             skip_version_check=self._settings.SKIP_VERSION_CHECK,
+            retry_policy=RetryPolicy(
+                max_attempts=int(self._settings.ZABBIX_MAX_ATTEMPTS),
+                backoff=int(self._settings.ZABBIX_RETRY_DELAY) / 1000,
+                max_backoff=int(self._settings.ZABBIX_RETRY_MAX_DELAY) / 1000,
+            ),
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=int(self._settings.ZABBIX_CIRCUIT_BREAKER_THRESHOLD),
+                reset_timeout=int(self._settings.ZABBIX_CIRCUIT_BREAKER_TIMEOUT),
+            ),
+            method_timeouts=self._settings.ZABBIX_METHOD_TIMEOUTS,
+            # Size the pool to the export concurrency, so connections are reused
+            connection_limit=(
+                int(self._settings.ZABBIX_CONNECTION_LIMIT)
+                or int(self._settings.BATCH_SIZE)
+            ),
+            keepalive_timeout=int(self._settings.ZABBIX_KEEPALIVE_TIMEOUT),
+            dns_cache_ttl=int(self._settings.ZABBIX_DNS_CACHE_TTL),
+            connect_timeout=int(self._settings.ZABBIX_CONNECT_TIMEOUT) or None,
+            read_limiter=RateLimiter(
+                rate=int(self._settings.ZABBIX_READ_RATE_LIMIT),
+                concurrency=int(self._settings.ZABBIX_READ_CONCURRENCY),
+            ),
+            write_limiter=RateLimiter(
+                rate=int(self._settings.ZABBIX_WRITE_RATE_LIMIT),
+                concurrency=int(self._settings.ZABBIX_WRITE_CONCURRENCY),
+            ),
+            cassette=cassette,
             **self._settings.ZABBIX_KWARGS,
         )
 
@@ -75,10 +118,43 @@ class ZabbixCI:
 
         self._git = Git(self._settings.CACHE_PATH, git_cb, **self._settings.GIT_KWARGS)
 
+    def api_metrics(self) -> dict[str, dict]:
+        """
+        Zabbix API statistics of the last push or pull, per API method
+        """
+        if not self._zabbix:
+            return {}
+
+        return self._zabbix.metrics.summary()
+
+    def _log_api_metrics(self) -> None:
+        if not self._zabbix:
+            return
+
+        rows = self._zabbix.metrics.table()
+
+        if not rows:
+            return
+
+        self.logger.info("Zabbix API requests (times in ms):")
+
+        for row in rows:
+            self.logger.info(row)
+
     async def push(self) -> bool:
         """
         Fetch Zabbix state and commit changes to git remote
         """
+        if self._zabbix:
+            self._zabbix.metrics.reset()
+
+        try:
+            return await self._push()
+        finally:
+            Manifest.save()
+            self._log_api_metrics()
+
+    async def _push(self) -> bool:
         if not self._git or not self._zabbix:
             raise ValueError(
                 "ZabbixCI has not been initialized, call create_zabbix() and create_git() first"
@@ -109,20 +185,38 @@ class ZabbixCI:
                 # Create a new branch
                 self._git.switch_branch(Settings.PUSH_BRANCH)
 
-        # Reflect current Zabbix state in the cache
-        Cleanup.cleanup_cache()
+        # Metadata is cached for the duration of a single run
+        self._zabbix.invalidate_metadata()
 
         template_handler = TemplateHandler(self._zabbix)
         image_handler = ImageHandler(self._zabbix)
         icon_map_handler = IconMapHandler(self._zabbix)
 
-        template_objects = await template_handler.templates_to_cache()
-        image_objects = image_handler.images_to_cache()
-        icon_map_handler.icon_map_to_cache(image_objects)
+        changed_template_ids = (
+            await template_handler.changed_templates()
+            if Settings.INCREMENTAL_PUSH
+            else None
+        )
+
+        # Reflect current Zabbix state in the cache, exported files are marked and
+        # the files that were not exported are removed afterwards
+        Cache.reset_marks()
+
+        template_objects = await template_handler.templates_to_cache(
+            changed_template_ids
+        )
+        image_objects = await image_handler.images_to_cache()
+        await icon_map_handler.icon_map_to_cache(image_objects)
+
+        # Unchanged templates are kept in incremental mode
+        Cleanup.cleanup_cache(
+            skip_templates=changed_template_ids is not None, sweep=True
+        )
 
         # Check if there are any changes to commit
         if not self._git.has_changes and not self._git.ahead_of_remote:
             self.logger.info("No changes detected")
+            template_handler.save_push_state()
             return False
 
         self.logger.info("Remote differs from local state, preparing to push")
@@ -145,6 +239,10 @@ class ZabbixCI:
 
             change_amount = len(changes)
 
+            # Template metadata updates are sent together after processing the changes
+            template_ids = {t["host"]: t["templateid"] for t in template_objects}
+            metadata_updates: dict[str, dict] = {}
+
             for relative_path, status in changes.items():
                 file = f"{Settings.CACHE_PATH}/{relative_path}"
 
@@ -157,7 +255,7 @@ class ZabbixCI:
                 if not template_handler.read_validation(file):
                     continue
 
-                template = Template.open(file)
+                template = Template.open(file, round_trip=True)
 
                 if (
                     Settings.VENDOR
@@ -178,19 +276,17 @@ class ZabbixCI:
                 ):
                     template.save()
 
-                    if not Settings.DRY_RUN:
+                    if not Settings.DRY_RUN and template.name in template_ids:
                         self.logger.debug(
                             "Updating template metadata for: %s", template.name
                         )
-                        self._zabbix.set_template(
-                            next(
-                                filter(
-                                    lambda t: t["host"] == template.name,
-                                    template_objects,
-                                )
-                            )["templateid"],
-                            template.updated_items,
-                        )
+                        metadata_updates[template.name] = {
+                            "templateid": template_ids[template.name],
+                            **template.updated_items,
+                        }
+
+            if metadata_updates:
+                await self._update_template_metadata(metadata_updates)
 
             if not Settings.DRY_RUN:
                 # Commit and push the changes
@@ -224,12 +320,65 @@ class ZabbixCI:
                 Settings.PUSH_BRANCH,
             )
 
+        template_handler.save_push_state()
         return change_amount > 0
 
+    async def _update_template_metadata(self, updates: dict[str, dict]) -> None:
+        """
+        Update the vendor and version of templates in Zabbix with a single
+        template.update call. template.update is atomic, when it fails the
+        templates are updated separately to only skip the failing ones.
+
+        :param updates: Template update objects by template name
+        """
+        self.logger.info("Updating template metadata for %d template(s)", len(updates))
+
+        try:
+            await self._zabbix.set_templates(list(updates.values()))
+            return
+        except (APIRequestError, ProcessingError) as e:
+            self.logger.warning(
+                "Combined template metadata update failed, updating separately"
+            )
+            self.logger.debug("Error details: %s", e)
+
+        batch = self._zabbix.batch()
+        results = [
+            (
+                name,
+                self._zabbix.set_template(
+                    update["templateid"],
+                    {k: v for k, v in update.items() if k != "templateid"},
+                    batch=batch,
+                ),
+            )
+            for name, update in updates.items()
+        ]
+
+        await batch.send()
+
+        for name, result in results:
+            try:
+                await result
+            except (APIRequestError, ProcessingError) as e:
+                self.logger.error(
+                    "Error updating template metadata for %s: %s", name, e
+                )
+
     async def pull(self) -> bool:
         """
         Pull current state from git remote and update Zabbix
         """
+        if self._zabbix:
+            self._zabbix.metrics.reset()
+
+        try:
+            return await self._pull()
+        finally:
+            Manifest.save()
+            self._log_api_metrics()
+
+    async def _pull(self) -> bool:
         if not self._git or not self._zabbix:
             raise ValueError(
                 "ZabbixCI has not been initialized, call create_zabbix() and create_git() first"
@@ -252,16 +401,22 @@ class ZabbixCI:
 
         current_revision = self._git.get_current_revision()
 
-        # Reflect current Zabbix state in the cache
-        Cleanup.cleanup_cache()
+        # Reflect current Zabbix state in the cache, exported files are marked and
+        # the files that were not exported are removed afterwards
+        Cache.reset_marks()
+
+        # Metadata is cached for the duration of a single run
+        self._zabbix.invalidate_metadata()
 
         template_handler = TemplateHandler(self._zabbix)
         image_handler = ImageHandler(self._zabbix)
         icon_map_handler = IconMapHandler(self._zabbix)
 
         template_objects = await template_handler.templates_to_cache()
-        image_objects = image_handler.images_to_cache()
-        icon_map_objects = icon_map_handler.icon_map_to_cache(image_objects)
+        image_objects = await image_handler.images_to_cache()
+        icon_map_objects = await icon_map_handler.icon_map_to_cache(image_objects)
+
+        Cleanup.cleanup_cache(sweep=True)
 
         # Check if there are any changes to commit
         if self._git.has_changes:
@@ -291,31 +446,32 @@ class ZabbixCI:
         # Sync the file cache with the desired git state
         self._git.reset(current_revision, ResetMode.HARD)
 
-        imported_template_ids, failed_template_names = (
-            template_handler.import_file_changes(changed_files)
-        )
-        deleted_template_names = template_handler.delete_file_changes(
+        (
+            imported_template_ids,
+            failed_template_names,
+        ) = await template_handler.import_file_changes(changed_files)
+        deleted_template_names = await template_handler.delete_file_changes(
             deleted_files,
             [*imported_template_ids, *failed_template_names],
             template_objects,
         )
 
-        imported_images = image_handler.import_file_changes(
+        imported_images = await image_handler.import_file_changes(
             changed_files, image_objects
         )
 
         if imported_images:
             # Update available image objects (only needed for Zabbix image id's)
-            image_objects = image_handler.images_to_cache()
+            image_objects = await image_handler.zabbix_images()
 
-        imported_icon_maps = icon_map_handler.import_file_changes(
+        imported_icon_maps = await icon_map_handler.import_file_changes(
             changed_files, icon_map_objects, image_objects
         )
-        deleted_icon_map_names = icon_map_handler.delete_file_changes(
+        deleted_icon_map_names = await icon_map_handler.delete_file_changes(
             deleted_files, imported_icon_maps, icon_map_objects
         )
 
-        deleted_image_names = image_handler.delete_file_changes(
+        deleted_image_names = await image_handler.delete_file_changes(
             deleted_files, imported_images, image_objects
         )
 